@@ -0,0 +1,339 @@
+"""
+This module contains a YAML emitter specialized for the output documents.
+
+The output documents are plain trees of dicts, lists and scalars without
+aliases, so most of the work done by the generic PyYAML dumper is not needed.
+The emitter produces the same bytes as `yaml.safe_dump` with
+`sort_keys=False` and falls back to PyYAML for anything it does not handle,
+e.g. multiline strings or strings that need double quotes.
+"""
+
+import yaml
+from yaml.emitter import Emitter
+from yaml.resolver import Resolver
+
+
+class NoAliasSafeDumper(yaml.SafeDumper):
+    """
+    Safe dumper that writes objects shared within a document in full
+    instead of using anchors and aliases.
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
+
+class UnsupportedYamlError(Exception):
+    """
+    Raised when a document can not be written by the YamlEmitter.
+    """
+    pass
+
+
+STR_TAG = "tag:yaml.org,2002:str"
+INT_TAG = "tag:yaml.org,2002:int"
+FLOAT_TAG = "tag:yaml.org,2002:float"
+BOOL_TAG = "tag:yaml.org,2002:bool"
+NULL_TAG = "tag:yaml.org,2002:null"
+
+# The same infinity PyYAML's representer compares floats with.
+INF_VALUE = yaml.representer.SafeRepresenter.inf_value
+
+# Shared helpers to analyze scalars the way PyYAML does.
+scalar_analyzer = Emitter(None)
+scalar_resolver = Resolver()
+
+
+class YamlEmitter:
+    """
+    This class writes JSON-compatible dict/list/scalar trees as block YAML.
+
+    Quoting decisions are cached per string, so an emitter should be reused
+    across the documents of one split.
+    """
+    indent: int = 2
+    width: int = 80
+
+    def __init__(self, indent: int = 2, width: int = 80):
+        self.indent = indent
+        self.width = width
+        # Same rules as PyYAML to pick the effective indent and width.
+        self.best_indent = indent if indent and 1 < indent < 10 else 2
+        self.best_width = width if width and width > self.best_indent * 2 \
+            else 80
+        # Maps a scalar to its (value style, simple key style). A style is
+        # None if the scalar can not be written by this emitter.
+        self.str_styles = {}
+        self.other_styles = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Resets the writer state.
+        """
+        self.chunks = []
+        self.column = 0
+        self.whitespace = True
+        self.indention = True
+        self.current_indent = None
+
+    def emit(self, data, stream) -> None:
+        """
+        Writes the YAML document to the stream.
+
+        :param data: The document.
+        :param stream: A text stream.
+        """
+        stream.write(self.dumps(data))
+
+    def dumps(self, data) -> str:
+        """
+        Returns the YAML document as a string.
+
+        :param data: The document.
+        """
+        try:
+            return self.render(data)
+        except UnsupportedYamlError:
+            return yaml.dump(data,
+                             Dumper=NoAliasSafeDumper,
+                             sort_keys=False,
+                             indent=self.indent,
+                             width=self.width)
+
+    def render(self, data) -> str:
+        """
+        Renders the YAML document.
+
+        :param data: The document.
+        :raises UnsupportedYamlError: if the document needs the generic
+                                      dumper.
+        """
+        if type(data) is not dict and type(data) is not list:
+            raise UnsupportedYamlError("root must be a dict or a list")
+        self.reset()
+        try:
+            self.emit_node(data)
+            self.current_indent = None
+            self.write_indent()
+            return "".join(self.chunks)
+        finally:
+            self.chunks = []
+
+    def emit_node(self, data, mapping: bool = False):
+        kind = type(data)
+        if kind is dict:
+            if data:
+                self.emit_block_mapping(data)
+            else:
+                self.write_indicator("{", True, whitespace=True)
+                self.write_indicator("}", False)
+        elif kind is list:
+            if data:
+                self.emit_block_sequence(data,
+                                         mapping and not self.indention)
+            else:
+                self.write_indicator("[", True, whitespace=True)
+                self.write_indicator("]", False)
+        else:
+            self.emit_scalar(data)
+
+    def emit_block_mapping(self, data: dict):
+        parent_indent = self.current_indent
+        self.current_indent = 0 if parent_indent is None \
+            else parent_indent + self.best_indent
+        for key, value in data.items():
+            self.write_indent()
+            self.emit_scalar(key, simple_key=True)
+            self.write_indicator(":", False)
+            self.emit_node(value, mapping=True)
+        self.current_indent = parent_indent
+
+    def emit_block_sequence(self, data: list, indentless: bool):
+        parent_indent = self.current_indent
+        if parent_indent is None:
+            self.current_indent = 0
+        elif not indentless:
+            self.current_indent = parent_indent + self.best_indent
+        for item in data:
+            self.write_indent()
+            self.write_indicator("-", True, indention=True)
+            self.emit_node(item)
+        self.current_indent = parent_indent
+
+    def emit_scalar(self, data, simple_key: bool = False):
+        kind = type(data)
+        if kind is str:
+            text = data
+            styles = self.str_styles.get(text)
+            if styles is None:
+                styles = choose_scalar_styles(STR_TAG, text)
+                self.str_styles[text] = styles
+        else:
+            tag, text = represent_scalar(data)
+            styles = self.other_styles.get((tag, text))
+            if styles is None:
+                styles = choose_scalar_styles(tag, text)
+                self.other_styles[(tag, text)] = styles
+
+        style = styles[1] if simple_key else styles[0]
+        if style is None:
+            raise UnsupportedYamlError(f"unsupported scalar {text!r}")
+
+        parent_indent = self.current_indent
+        self.current_indent = self.best_indent if parent_indent is None \
+            else parent_indent + self.best_indent
+        if style == "'":
+            self.write_single_quoted(text, not simple_key)
+        else:
+            self.write_plain(text, not simple_key)
+        self.current_indent = parent_indent
+
+    def write(self, data: str):
+        self.column += len(data)
+        self.chunks.append(data)
+
+    def write_indicator(self, indicator: str, need_whitespace: bool,
+                        whitespace: bool = False, indention: bool = False):
+        if self.whitespace or not need_whitespace:
+            data = indicator
+        else:
+            data = " " + indicator
+        self.whitespace = whitespace
+        self.indention = self.indention and indention
+        self.write(data)
+
+    def write_indent(self):
+        indent = self.current_indent or 0
+        if not self.indention or self.column > indent \
+                or (self.column == indent and not self.whitespace):
+            self.whitespace = True
+            self.indention = True
+            self.column = 0
+            self.chunks.append("\n")
+        if self.column < indent:
+            self.whitespace = True
+            self.write(" " * (indent - self.column))
+
+    def write_plain(self, text: str, split: bool):
+        if not text:
+            return
+        if not self.whitespace:
+            self.write(" ")
+        self.whitespace = False
+        self.indention = False
+        if not split or self.column + len(text) <= self.best_width \
+                or " " not in text:
+            self.write(text)
+            return
+
+        # Fold long lines at single spaces, like PyYAML does.
+        spaces = False
+        start = end = 0
+        while end <= len(text):
+            ch = text[end] if end < len(text) else None
+            if spaces:
+                if ch != " ":
+                    if start + 1 == end and self.column > self.best_width:
+                        self.write_indent()
+                        self.whitespace = False
+                        self.indention = False
+                    else:
+                        self.write(text[start:end])
+                    start = end
+            elif ch is None or ch == " ":
+                self.write(text[start:end])
+                start = end
+            if ch is not None:
+                spaces = (ch == " ")
+            end += 1
+
+    def write_single_quoted(self, text: str, split: bool):
+        self.write_indicator("'", True)
+        quoted = text.replace("'", "''")
+        if not split or self.column + len(quoted) <= self.best_width \
+                or " " not in text:
+            self.write(quoted)
+            self.write_indicator("'", False)
+            return
+
+        # Fold long lines at single spaces, like PyYAML does.
+        spaces = False
+        start = end = 0
+        while end <= len(text):
+            ch = text[end] if end < len(text) else None
+            if spaces:
+                if ch != " ":
+                    if start + 1 == end and self.column > self.best_width \
+                            and start != 0 and end != len(text):
+                        self.write_indent()
+                    else:
+                        self.write(text[start:end])
+                    start = end
+            elif ch is None or ch == " " or ch == "'":
+                if start < end:
+                    self.write(text[start:end])
+                    start = end
+            if ch == "'":
+                self.write("''")
+                start = end + 1
+            if ch is not None:
+                spaces = (ch == " ")
+            end += 1
+        self.write_indicator("'", False)
+
+
+def represent_scalar(data) -> tuple[str, str]:
+    """
+    Returns the tag and the text of a non-string scalar, as PyYAML's safe
+    representer would.
+    """
+    kind = type(data)
+    if kind is bool:
+        return BOOL_TAG, "true" if data else "false"
+    if kind is int:
+        return INT_TAG, str(data)
+    if kind is float:
+        if data != data:
+            return FLOAT_TAG, ".nan"
+        if data == INF_VALUE:
+            return FLOAT_TAG, ".inf"
+        if data == -INF_VALUE:
+            return FLOAT_TAG, "-.inf"
+        value = repr(data).lower()
+        if "." not in value and "e" in value:
+            value = value.replace("e", ".0e", 1)
+        return FLOAT_TAG, value
+    if data is None:
+        return NULL_TAG, "null"
+    raise UnsupportedYamlError(f"unsupported type {kind.__name__}")
+
+
+def choose_scalar_styles(tag: str, text: str) -> tuple:
+    """
+    Returns the styles PyYAML would use to write the scalar as a block value
+    and as a simple mapping key.
+
+    Only plain ('') and single-quoted (') scalars on a single line are
+    supported, anything else is returned as None.
+    """
+    analysis = scalar_analyzer.analyze_scalar(text)
+    if analysis.multiline:
+        return None, None
+    implicit = scalar_resolver.resolve(yaml.ScalarNode, text,
+                                       (True, False)) == tag
+
+    if implicit and analysis.allow_block_plain:
+        value_style = ""
+    elif analysis.allow_single_quoted:
+        value_style = "'"
+    else:
+        value_style = None
+
+    # The tag is counted in the simple key length even if it is implicit.
+    tag_length = len("!!") + len(tag.rsplit(":", 1)[1])
+    if analysis.empty or tag_length + len(text) >= 128:
+        key_style = None
+    else:
+        key_style = value_style
+    return value_style, key_style
@@ -0,0 +1,247 @@
+"""
+This module contains the RefGraph class that represents the references
+between the paths and the components of the OpenAPI specification.
+"""
+
+from dataclasses import dataclass
+
+# Graph node of everything that is not a path or a component.
+ROOT = "#"
+
+
+@dataclass
+class RefGraph:
+    """
+    This class represents a directed graph of references. The nodes are
+    local reference paths, e.g. #/components/schemas/Pet.
+    """
+    # Maps a node to the nodes it references. The targets are dict keys so
+    # they stay unique and in insertion order.
+    edges: dict[str, dict[str, None]] = None
+
+    def __init__(self):
+        self.edges = {}
+
+    def add_node(self, node: str):
+        """
+        Adds a node if it does not exist yet.
+
+        :param node: The node.
+        """
+        if node not in self.edges:
+            self.edges[node] = {}
+
+    def add_edge(self, src: str, dst: str):
+        """
+        Adds a reference from src to dst.
+
+        :param src: The referencing node.
+        :param dst: The referenced node.
+        """
+        self.add_node(src)
+        self.add_node(dst)
+        self.edges[src][dst] = None
+
+    def merge(self, other: 'RefGraph'):
+        """
+        Adds the nodes and the edges of another graph.
+
+        :param other: The graph to merge.
+        """
+        for src, dsts in other.edges.items():
+            self.add_node(src)
+            for dst in dsts:
+                self.add_edge(src, dst)
+
+    def reachable(self, roots) -> set[str]:
+        """
+        Returns the nodes reachable from the roots, including the roots.
+
+        :param roots: The nodes to start from.
+        """
+        result = set()
+        stack = [root for root in roots if root in self.edges]
+        while stack:
+            node = stack.pop()
+            if node in result:
+                continue
+            result.add(node)
+            stack.extend(dst for dst in self.edges[node]
+                         if dst not in result)
+        return result
+
+    def fan_out(self) -> dict[str, int]:
+        """
+        Returns the number of nodes each node references.
+        """
+        return {node: len(dsts) for node, dsts in self.edges.items()}
+
+    def fan_in(self) -> dict[str, int]:
+        """
+        Returns the number of nodes referencing each node.
+        """
+        result = {node: 0 for node in self.edges}
+        for dsts in self.edges.values():
+            for dst in dsts:
+                result[dst] += 1
+        return result
+
+    def cycles(self) -> list[list[str]]:
+        """
+        Returns the groups of nodes that reference each other, i.e. the
+        strongly connected components with more than one node or with a
+        reference to itself.
+        """
+        # Iterative Tarjan, specs can nest references deep enough to hit
+        # the recursion limit.
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        result = []
+        for start in self.edges:
+            if start in index:
+                continue
+            work = [(start, iter(self.edges[start]))]
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, dsts = work[-1]
+                dst = next(dsts, None)
+                if dst is not None:
+                    if dst not in index:
+                        index[dst] = lowlink[dst] = len(index)
+                        stack.append(dst)
+                        on_stack.add(dst)
+                        work.append((dst, iter(self.edges[dst])))
+                    elif dst in on_stack:
+                        lowlink[node] = min(lowlink[node], index[dst])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.edges[node]:
+                        result.append(list(reversed(component)))
+        return result
+
+    def report(self, top: int = 10) -> str:
+        """
+        Returns a report of the fan-in, the fan-out and the cycles.
+
+        :param top: The number of nodes to list for fan-in and fan-out.
+        """
+        fan_in = self.fan_in()
+        fan_out = self.fan_out()
+        cycles = self.cycles()
+        edge_count = sum(fan_out.values())
+
+        lines = [f"Reference graph: {len(self.edges)} nodes, "
+                 f"{edge_count} references, {len(cycles)} cycles"]
+        for title, counts in [("fan-in", fan_in), ("fan-out", fan_out)]:
+            lines.append(f"Top {title}:")
+            ranked = sorted(counts.items(), key=lambda item: -item[1])
+            for node, count in ranked[:top]:
+                if count > 0:
+                    lines.append(f"  {count:6d} {node}")
+        if cycles:
+            lines.append("Cycles:")
+            for cycle in cycles:
+                lines.append("  " + " -> ".join(cycle + cycle[:1]))
+        return "\n".join(lines)
+
+
+def ref_target(ref: str) -> str:
+    """
+    Returns the graph node a local reference points to, i.e. the path or
+    the component containing the target.
+
+    :param ref: The reference, e.g. #/components/schemas/Pet/properties/id.
+    :return: The graph node, or None for a reference to another file.
+    """
+    if not ref.startswith("#"):
+        return None
+    parts = ref.split("/")
+    if len(parts) >= 4 and parts[1] == "components":
+        return "/".join(parts[:4])
+    if len(parts) >= 3 and parts[1] == "paths":
+        return "/".join(parts[:3])
+    return ROOT
+
+
+def collect_refs(yaml, mapping_names: bool = False) -> list[str]:
+    """
+    Collects the values of all $ref keys and the references in
+    discriminator mappings.
+
+    :param yaml: The YAML to search.
+    :param mapping_names: Whether to include the mapping values that are
+                          schema names, as #/components/schemas/<name>.
+    """
+    refs = []
+    stack = [yaml]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if key == "$ref" and isinstance(value, str):
+                    refs.append(value)
+                else:
+                    if key == "discriminator":
+                        refs.extend(mapping_refs(value, mapping_names))
+                    stack.append(value)
+        elif isinstance(item, list):
+            stack.extend(item)
+    return refs
+
+
+def mapping_refs(discriminator, names: bool = False) -> list[str]:
+    """
+    Returns the references in the mapping of a discriminator.
+
+    :param discriminator: The discriminator object.
+    :param names: Whether to include the values that are schema names, as
+                  #/components/schemas/<name>.
+    """
+    if not isinstance(discriminator, dict) or \
+            not isinstance(discriminator.get("mapping"), dict):
+        return []
+    refs = []
+    for value in discriminator["mapping"].values():
+        if not isinstance(value, str):
+            continue
+        if is_schema_name(value):
+            if names:
+                refs.append("#/components/schemas/" + value)
+        else:
+            refs.append(value)
+    return refs
+
+
+def is_schema_name(value: str) -> bool:
+    """
+    Determines if a discriminator mapping value is a schema name rather than
+    a reference.
+
+    :param value: The mapping value, e.g. Dog or #/components/schemas/Dog.
+    """
+    return "#" not in value and "/" not in value and \
+        not value.endswith((".yaml", ".yml", ".json"))
+
+
+def path_ref(name: str) -> str:
+    """
+    Returns the local reference of a path item.
+
+    :param name: The path, e.g. /pets/{petId}.
+    """
+    return "#/paths/" + name.replace("~", "~0").replace("/", "~1")
@@ -2,31 +2,120 @@
 Input/Output functions.
 """
 
+import codecs
 import os
+import sys
 import yaml
 
+from openapi_splitter.emitter import YamlEmitter
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Shared emitter so quoting decisions are cached across output documents.
+default_emitter = YamlEmitter()
+
 
 def read_yaml_from_file(file: str) -> dict:
     """
     Read YAML from file.
+
+    Use "-" to read from the standard input.
     """
-    with open(file, 'r') as stream:
-        try:
-            return yaml.safe_load(stream)
-        except yaml.YAMLError as exc:
-            raise ValueError("Invalid YAML file") from exc
+    try:
+        if file == "-":
+            return read_yaml_from_stream(sys.stdin.buffer)
+        with open(file, 'rb') as stream:
+            return read_yaml_from_stream(stream)
+    except (yaml.YAMLError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid YAML file") from exc
 
 
-def write_yaml_to_file(file: str, input: dict) -> None:
+def read_yaml_from_stream(stream) -> dict:
+    """
+    Read YAML from a binary stream, detecting its encoding.
+
+    :param stream: A binary stream.
+    """
+    start = stream.tell() if stream.seekable() else None
+    head = b""
+    while len(head) < 4:
+        data = stream.read(4 - len(head))
+        if not data:
+            break
+        head += data
+
+    encoding, bom_length = detect_encoding(head)
+    if encoding != "utf-8":
+        # Rare enough to decode as a whole.
+        data = head[bom_length:] + stream.read()
+        return yaml.load(codecs.decode(data, encoding), Loader=SafeLoader)
+    if start is None:
+        # Pipes can not be rewound past the head.
+        return yaml.load(head[bom_length:] + stream.read(), Loader=SafeLoader)
+    stream.seek(start + bom_length)
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def detect_encoding(head: bytes) -> tuple[str, int]:
+    """
+    Detect the encoding of a YAML stream from its first bytes, as described
+    in the YAML specification.
+
+    :param head: The first bytes of the stream, at least four if available.
+    :return: The encoding and the length of the byte order mark.
+    """
+    if head.startswith(codecs.BOM_UTF32_BE):
+        return "utf-32-be", 4
+    if head.startswith(codecs.BOM_UTF32_LE):
+        return "utf-32-le", 4
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8", 3
+    if head.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16-be", 2
+    if head.startswith(codecs.BOM_UTF16_LE):
+        return "utf-16-le", 2
+    if head[:3] == b"\0\0\0" and len(head) >= 4:
+        return "utf-32-be", 0
+    if head[1:4] == b"\0\0\0":
+        return "utf-32-le", 0
+    if head[:1] == b"\0" and len(head) >= 2:
+        return "utf-16-be", 0
+    if head[1:2] == b"\0":
+        return "utf-16-le", 0
+    return "utf-8", 0
+
+
+def write_yaml_to_file(file: str, input: dict,
+                       emitter: YamlEmitter = None) -> None:
     """
     Write YAML to file.
+
+    :param emitter: The emitter to use, defaults to a shared emitter with
+                    an indent of 2 and a line width of 80.
     """
+    if emitter is None:
+        emitter = default_emitter
+
     # Force create directory
     directory = os.path.dirname(file)
     os.makedirs(directory, exist_ok=True)
 
-    with open(file, 'w') as stream:
-        try:
-            yaml.safe_dump(input, stream, sort_keys=False)
-        except yaml.YAMLError as exc:
-            raise ValueError("Invalid YAML file") from exc
+    # Write to a temporary file next to the target and rename it, so the
+    # target is never left truncated. The file is created with the same
+    # mode as open() would, so the umask applies.
+    name = f".{os.path.basename(file)}.{os.urandom(8).hex()}.tmp"
+    temp_file = os.path.join(directory, name)
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, 'w') as stream:
+            try:
+                emitter.emit(input, stream)
+            except yaml.YAMLError as exc:
+                raise ValueError("Invalid YAML file") from exc
+        os.replace(temp_file, file)
+    except BaseException:
+        os.remove(temp_file)
+        raise
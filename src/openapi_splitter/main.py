@@ -1,35 +1,87 @@
 import argparse
 import os
+import stat
 
-from openapi_splitter.io import read_yaml_from_file, write_yaml_to_file
+from openapi_splitter.io import read_yaml_from_file
+from openapi_splitter.selector import Selector
 from openapi_splitter.splitter import Splitter
 from openapi_splitter.verbose import vprint
+from openapi_splitter.verifier import verify_output_dir, \
+    verify_output_documents
+from openapi_splitter.writer import STAGING_PREFIX, DurabilityPolicy, \
+    OutputWriter, remove_stale_staging_dirs
 
 
-def generate(input_file: str, output_dir: str, verbose=False) -> None:
+def generate(input_file: str, output_dir: str, verbose=False,
+             workers: int = 1, chunk_size: int = 0, prune: bool = False,
+             stats: bool = False, verify: bool = False,
+             selector: Selector = None,
+             durability: DurabilityPolicy = DurabilityPolicy.NONE) -> None:
     """
     Generate the output files.
+
+    :param workers: The number of worker processes to split with.
+    :param chunk_size: The number of paths or components per worker task,
+                       0 for about four tasks per worker.
+    :param prune: Whether to leave out components that are not reachable
+                  from the paths.
+    :param stats: Whether to print the reference graph statistics.
+    :param verify: Whether to verify the references of the output documents
+                   before writing them.
+    :param selector: Selects the paths and components to split, None to
+                     split everything.
+    :param durability: How the output files are flushed to disk.
     """
 
     input_yaml = read_yaml_from_file(input_file)
-    splitter = Splitter(input_yaml, output_dir)
+    splitter = Splitter(input_yaml, output_dir, workers, chunk_size, prune,
+                        selector)
     splitter.split()
+    if prune:
+        vprint(verbose, "Pruned {} unreachable components".format(
+            len(splitter.pruned)))
+    if stats:
+        print(splitter.graph.report())
+    if verify:
+        report = verify_output_documents(splitter.output_documents)
+        if not report.ok:
+            print(report)
+            raise ValueError("The output has unresolved references.")
+        vprint(verbose, report)
+
+    writer = OutputWriter(output_dir, verbose=verbose, durability=durability)
+    write_stats = writer.write(splitter.output_documents)
+    vprint(verbose, write_stats)
+
+
+def verify(output_dir: str) -> bool:
+    """
+    Verify the references of a split output directory.
 
-    for output_document in splitter.output_documents:
-        file_path = output_dir + "/" + output_document.filename
-        vprint(verbose, "Writing file: {}".format(file_path))
-        write_yaml_to_file(file_path, output_document.yaml)
+    :param output_dir: The output directory.
+    :return: Whether all references resolve.
+    """
+    report = verify_output_dir(output_dir)
+    print(report)
+    return report.ok
 
 
 def validate_input_file(file: str) -> None:
     """
     Validate the input file.
 
-    :param file: The input file.
+    :param file: The input file, a pipe, or "-" for the standard input.
     """
+    if file == "-":
+        return
     if not os.path.exists(file):
         raise FileNotFoundError(f"Input file {file} does not exist.")
-    if not os.path.isfile(file):
+    # Pipes, e.g. <(command), are read as streams. Other devices like
+    # /dev/zero may never end, so only inherited descriptors are allowed.
+    mode = os.stat(file).st_mode
+    if stat.S_ISDIR(mode) or not (
+            stat.S_ISREG(mode) or stat.S_ISFIFO(mode) or
+            file.startswith("/dev/fd/")):
         raise ValueError(f"Input file {file} is not a file.")
     # Not readable
     if not os.access(file, os.R_OK):
@@ -51,9 +103,12 @@ def validate_output_dir(dir: str) -> None:
     # Raise if not writable
     if not os.access(dir, os.W_OK):
         raise ValueError(f"Output directory {dir} is not writable.")
-    # Raise if not empty
-    if os.listdir(dir):
-        raise ValueError(f"Output directory {dir} is not empty.")
+    # Raise if not empty, stopping at the first entry. Staging directories
+    # are ignored, stale ones are removed by the writer.
+    with os.scandir(dir) as entries:
+        for entry in entries:
+            if not entry.name.startswith(STAGING_PREFIX):
+                raise ValueError(f"Output directory {dir} is not empty.")
 
 
 def main():
@@ -62,24 +117,117 @@ def main():
     """
     parser = argparse.ArgumentParser(
         description="Split an OpenAPI specification file into multiple files.")
-    parser.add_argument("input_file", help="The input file.")
-    parser.add_argument("output_dir", help="The output directory.")
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        help="The input file, or - to read from the standard input.")
+    parser.add_argument("output_dir", nargs="?",
+                        help="The output directory.")
+    parser.add_argument("--verify-dir",
+                        metavar="DIR",
+                        help="Verify that the references of an already "
+                             "split directory resolve, instead of "
+                             "splitting.")
     parser.add_argument("-q",
                         "--quiet",
                         action=argparse.BooleanOptionalAction,
                         help="Quiet mode.")
+    parser.add_argument("-j",
+                        "--jobs",
+                        type=int,
+                        default=1,
+                        help="Number of worker processes. The speedup "
+                             "has not been measured on multiple cores, on "
+                             "one core it is slower than 1.")
+    parser.add_argument("--chunk-size",
+                        type=int,
+                        default=0,
+                        help="Number of paths or components per worker "
+                             "task, 0 for about four tasks per worker.")
+    parser.add_argument("--prune",
+                        action="store_true",
+                        help="Leave out components that are not reachable "
+                             "from the paths.")
+    parser.add_argument("--stats",
+                        action="store_true",
+                        help="Print fan-in, fan-out and cycles of the "
+                             "references.")
+    parser.add_argument("--verify",
+                        action="store_true",
+                        help="Verify the references of the output before "
+                             "writing it.")
+    parser.add_argument("--include-path",
+                        action="append",
+                        metavar="GLOB",
+                        help="Only split the paths matching the glob, e.g. "
+                             "'/billing/*'. Can be repeated.")
+    parser.add_argument("--exclude-path",
+                        action="append",
+                        metavar="GLOB",
+                        help="Leave out the paths matching the glob. Can be "
+                             "repeated.")
+    parser.add_argument("--tag",
+                        action="append",
+                        metavar="GLOB",
+                        help="Only split the operations with a matching "
+                             "tag. Can be repeated.")
+    parser.add_argument("--include-component",
+                        action="append",
+                        metavar="GLOB",
+                        help="Only split the components whose name, or "
+                             "family/name, matches the glob. Can be "
+                             "repeated.")
+    parser.add_argument("--exclude-component",
+                        action="append",
+                        metavar="GLOB",
+                        help="Leave out the matching components unless "
+                             "they are referenced. Can be repeated.")
+    parser.add_argument("--fsync",
+                        choices=[policy.value
+                                 for policy in DurabilityPolicy],
+                        default=DurabilityPolicy.NONE.value,
+                        help="Flush the output to disk: none, every file as "
+                             "it is written, or everything at the end.")
     args = parser.parse_args()
 
+    if args.verify_dir is not None:
+        if args.input_file is not None:
+            parser.error("--verify-dir does not take an input file or an "
+                         "output directory")
+        if not os.path.isdir(args.verify_dir):
+            print(f"Output directory {args.verify_dir} is not a directory.")
+            parser.print_help()
+            exit(1)
+        exit(0 if verify(args.verify_dir) else 1)
+    if args.output_dir is None:
+        parser.error("the input file and the output directory are required")
+
     try:
         validate_input_file(args.input_file)
+        if os.path.isdir(args.output_dir):
+            # Clean up after a killed run, which may have published part of
+            # its output, before checking that the directory is empty.
+            remove_stale_staging_dirs(args.output_dir)
         validate_output_dir(args.output_dir)
     except Exception as e:
         print(e)
         parser.print_help()
         exit(1)
 
+    selector = None
+    if args.include_path or args.exclude_path or args.tag or \
+            args.include_component or args.exclude_component:
+        selector = Selector(args.include_path, args.exclude_path, args.tag,
+                            args.include_component, args.exclude_component)
+
     verbose = not args.quiet
-    generate(args.input_file, args.output_dir, verbose)
+    try:
+        generate(args.input_file, args.output_dir, verbose, args.jobs,
+                 args.chunk_size, args.prune, args.stats, args.verify,
+                 selector, DurabilityPolicy(args.fsync))
+    except ValueError as e:
+        print(e)
+        exit(1)
 
 
 if __name__ == '__main__':
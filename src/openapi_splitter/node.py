@@ -47,6 +47,11 @@ class Node:
     value = None
     level: int = 0
     kind = NodeKind.UNDEFINED
+    # The YAML object this node was built from.
+    source = None
+    # True if a descendant was replaced and `source` no longer matches the
+    # children.
+    dirty: bool = False
     parent: 'Node' = None
     prev_sibling: 'Node' = None
     children: list['Node'] = None
@@ -61,6 +66,7 @@ class Node:
                  parent: 'Node' = None,
                  sibling: 'Node' = None):
         self.children = []
+        self.dirty = False
         self.name = name
         self.level = level
         self.kind = kind
@@ -86,6 +92,7 @@ class Node:
             except Exception as exc:
                 raise RuntimeError("preproc failed") from exc
 
+        self.source = yaml
         if isinstance(yaml, dict):
             for key, value in yaml.items():
                 sibling = self.children[-1] if len(self.children) > 0 else None
@@ -128,14 +135,26 @@ class Node:
         self.children = ref_node.children
         for child in self.children:
             child.parent = self
+        self.source = ref_yaml
+        self.value = None
+        self.dirty = False
+        self.mark_ancestors_dirty()
+
+    def mark_ancestors_dirty(self):
+        """
+        Marks the ancestors as dirty so they are rebuilt from their children
+        instead of reusing their source YAML.
+        """
+        parent = self.parent
+        while parent and not parent.dirty:
+            parent.dirty = True
+            parent = parent.parent
 
     def rebuild_yaml(self):
         """
         Rebuilds the YAML from the children.
         """
         if self.name:
-            if is_scalar(self.value):
-                return {self.name: self.value}
             return {self.name: self.rebuild_children_yaml()}
         else:
             result = []
@@ -146,23 +165,16 @@ class Node:
     def rebuild_children_yaml(self):
         """
         Rebuilds the YAML from the children.
+
+        Subtrees that were not changed are returned as is, so only the
+        containers along the path to a replaced node are copied.
         """
-        result_dict = {}
-        result_list = []
-        for child in self.children:
-            if child.name:
-                if is_scalar(child.value):
-                    result_dict[child.name] = child.value
-                else:
-                    result_dict[child.name] = child.rebuild_children_yaml()
-            elif child.value:
-                result_list.append(child.value)
-            else:
-                result_list.append(child.rebuild_children_yaml())
-        if len(result_dict) > 0:
-            return result_dict
-        else:
-            return result_list
+        if not self.dirty:
+            return self.source
+        if isinstance(self.source, dict):
+            return {child.name: child.rebuild_children_yaml()
+                    for child in self.children}
+        return [child.rebuild_children_yaml() for child in self.children]
 
     def __str__(self):
         result = ""
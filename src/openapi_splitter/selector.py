@@ -0,0 +1,193 @@
+"""
+This module contains the Selector class that selects the paths and the
+components of the OpenAPI specification to split.
+"""
+
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+
+from .graph import collect_refs, path_ref, ref_target
+
+# The keys of a path item that are operations.
+OPERATIONS = ["get", "put", "post", "delete", "options", "head", "patch",
+              "trace"]
+
+
+@dataclass
+class Selector:
+    """
+    This class selects the paths and the components to split.
+
+    Paths are matched by glob, e.g. /billing/*, and by operation tag.
+    Components are matched by name, or by family/name if the pattern
+    contains a slash, e.g. schemas/Billing*. Without include filters,
+    everything that is not excluded is selected.
+
+    Everything referenced by the selected paths and components, with $ref
+    or in a discriminator mapping, is selected too, transitively, so the
+    output stays resolvable. Security schemes are
+    always kept, since they are referenced by name.
+    """
+    include_paths: list[str] = None
+    exclude_paths: list[str] = None
+    tags: list[str] = None
+    include_components: list[str] = None
+    exclude_components: list[str] = None
+
+    def __init__(self,
+                 include_paths: list[str] = None,
+                 exclude_paths: list[str] = None,
+                 tags: list[str] = None,
+                 include_components: list[str] = None,
+                 exclude_components: list[str] = None):
+        self.include_paths = include_paths or []
+        self.exclude_paths = exclude_paths or []
+        self.tags = tags or []
+        self.include_components = include_components or []
+        self.exclude_components = exclude_components or []
+
+    def has_include_filters(self) -> bool:
+        return bool(self.include_paths or self.tags or
+                    self.include_components)
+
+    def is_path_selected(self, name: str) -> bool:
+        """
+        Determines if a path matches the path filters.
+
+        :param name: The path, e.g. /pets/{petId}.
+        """
+        if self.has_include_filters():
+            if not self.include_paths and not self.tags:
+                return False
+            if self.include_paths and not matches_any(name,
+                                                      self.include_paths):
+                return False
+        return not matches_any(name, self.exclude_paths)
+
+    def select_operations(self, path_item):
+        """
+        Removes the operations that do not match the tag filter.
+
+        :param path_item: The path item.
+        :return: The path item, or None if no operation matches.
+        """
+        if not self.tags or not isinstance(path_item, dict):
+            return path_item
+        result = {}
+        selected = False
+        for key, value in path_item.items():
+            if key not in OPERATIONS:
+                result[key] = value
+            elif isinstance(value, dict) and any(
+                    matches_any(str(tag), self.tags)
+                    for tag in value.get("tags") or []):
+                result[key] = value
+                selected = True
+        return result if selected else None
+
+    def is_component_selected(self, family: str, name: str) -> bool:
+        """
+        Determines if a component matches the component filters.
+
+        :param family: The component family, e.g. schemas.
+        :param name: The component name.
+        """
+        if self.has_include_filters() and \
+                not self.matches_component(family, name,
+                                           self.include_components):
+            return False
+        return not self.matches_component(family, name,
+                                          self.exclude_components)
+
+    def matches_component(self, family: str, name: str,
+                          patterns: list[str]) -> bool:
+        qualified_name = f"{family}/{name}"
+        return any(fnmatchcase(qualified_name if "/" in pattern else name,
+                               pattern)
+                   for pattern in patterns)
+
+    def select(self, yaml: dict) -> dict:
+        """
+        Returns the document with only the selected paths and components.
+        Subtrees that are kept are shared with the input.
+
+        :param yaml: The document.
+        """
+        if not isinstance(yaml, dict):
+            return yaml
+        paths = yaml.get("paths")
+        components = yaml.get("components")
+        if not isinstance(paths, dict):
+            paths = {}
+        if not isinstance(components, dict):
+            components = {}
+
+        selected_paths = {}
+        for name, path_item in paths.items():
+            if self.is_path_selected(str(name)):
+                path_item = self.select_operations(path_item)
+                if path_item is not None:
+                    selected_paths[name] = path_item
+
+        selected_components = set()
+        for family, entries in components.items():
+            if family == "securitySchemes" or not isinstance(entries, dict):
+                continue
+            for name in entries:
+                if self.is_component_selected(family, str(name)):
+                    selected_components.add((family, name))
+
+        # Everything outside paths and components is kept as is.
+        pending = [value for key, value in yaml.items()
+                   if key not in ("paths", "components")]
+        pending.extend(selected_paths.values())
+        pending.extend(components[family][name]
+                       for family, name in selected_components)
+        if isinstance(components.get("securitySchemes"), dict):
+            pending.append(components["securitySchemes"])
+        path_names = {path_ref(str(name)): name for name in paths}
+
+        # Pull in the referenced paths and components, including the
+        # schemas of discriminator mappings.
+        while pending:
+            for ref in collect_refs(pending.pop(), mapping_names=True):
+                target = ref_target(ref)
+                if not target or target == "#":
+                    continue
+                parts = target.split("/")
+                if parts[1] == "paths":
+                    name = path_names.get(target)
+                    if name is not None and name not in selected_paths:
+                        selected_paths[name] = paths[name]
+                        pending.append(paths[name])
+                    continue
+                family, name = parts[2], parts[3]
+                entries = components.get(family)
+                if isinstance(entries, dict) and name in entries and \
+                        (family, name) not in selected_components:
+                    selected_components.add((family, name))
+                    pending.append(entries[name])
+
+        result = dict(yaml)
+        if "paths" in yaml:
+            result["paths"] = {name: selected_paths[name]
+                               for name in paths if name in selected_paths}
+        if "components" in yaml and isinstance(yaml["components"], dict):
+            result["components"] = {}
+            for family, entries in components.items():
+                if family == "securitySchemes" or \
+                        not isinstance(entries, dict):
+                    result["components"][family] = entries
+                    continue
+                entries = {name: value for name, value in entries.items()
+                           if (family, name) in selected_components}
+                if entries:
+                    result["components"][family] = entries
+        return result
+
+
+def matches_any(name: str, patterns: list[str]) -> bool:
+    """
+    Determines if a name matches any of the glob patterns.
+    """
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
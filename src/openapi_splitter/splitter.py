@@ -2,9 +2,27 @@
 This module contains the Splitter class.
 """
 import os
+from concurrent.futures import ProcessPoolExecutor
 from os.path import relpath
 from dataclasses import dataclass
+from .graph import RefGraph, ROOT, mapping_refs, path_ref, ref_target
 from .node import Node, NodeKind
+from .selector import Selector
+
+# The sections whose entries are split into their own documents, as key
+# paths from the document root.
+SPLIT_SECTIONS = [
+    ("paths",),
+    ("components", "schemas"),
+    ("components", "parameters"),
+    ("components", "securitySchemes"),
+    ("components", "headers"),
+]
+
+
+# Number of partitions per worker when the chunk size is derived, so a
+# worker that finishes early can pick up more work.
+TASKS_PER_WORKER = 4
 
 
 @dataclass
@@ -20,6 +38,8 @@ class OutputDocument:
 class Ref:
     """
     This class represents a reference.
+
+    The node is not set for references created in a worker process.
     """
     path: str = None
     node: Node = None
@@ -38,18 +58,61 @@ class Splitter:
     verbose = False
     output_documents: list[OutputDocument] = None
     refs: dict[str, Ref] = None
+    # Number of worker processes, 1 splits in the current process.
+    workers: int = 1
+    # Number of entries per partition in parallel mode, 0 to derive it from
+    # the number of entries and workers.
+    chunk_size: int = 0
+    # References between the paths and the components.
+    graph: RefGraph = None
+    # Whether to leave out components that are not reachable from the paths.
+    prune: bool = False
+    # The references of the components left out by pruning.
+    pruned: list[str] = None
+    # Selects the paths and components to split, None to split everything.
+    selector: Selector = None
 
-    def __init__(self, yaml: dict, output_dir: str):
+    def __init__(self, yaml: dict, output_dir: str, workers: int = 1,
+                 chunk_size: int = 0, prune: bool = False,
+                 selector: Selector = None):
         self.yaml = yaml
         self.output_dir = output_dir
         self.output_documents = []
         self.refs = {}
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.graph = RefGraph()
+        self.prune = prune
+        self.pruned = []
+        self.selector = selector
 
     def split(self):
         """
         Split the OpenAPI specification file into multiple files.
         """
-        root_node = Node(self.yaml, self.preprocess_node,
+        yaml = self.yaml
+        if self.selector:
+            # Skip what is not selected before building any node.
+            yaml = self.selector.select(yaml)
+
+        if self.workers > 1:
+            self.build_parallel(yaml)
+        else:
+            self.build(yaml)
+
+        if self.prune:
+            self.prune_unreachable_components()
+        self.fix_local_references_in_output_documents()
+
+    def build(self, yaml: dict):
+        """
+        Builds the node tree and the output documents, with the main
+        document last. Local references are not fixed yet.
+
+        :param yaml: The YAML to build from.
+        """
+        self.graph.add_node(ROOT)
+        root_node = Node(yaml, self.preprocess_node,
                          self.postprocess_node,
                          kind=NodeKind.DOCUMENT,
                          level=0)
@@ -58,7 +121,35 @@ class Splitter:
         root_document = OutputDocument("main.yaml", main_yaml)
         self.output_documents.append(root_document)
 
-        self.fix_local_references_in_output_documents()
+    def build_parallel(self, yaml: dict):
+        """
+        Builds the output documents of the split sections in worker
+        processes.
+
+        Each partition is built by its own Splitter in a worker. The rest of
+        the document is built here, then the documents, the references and
+        the main document entries of the partitions are merged in document
+        order.
+
+        :param yaml: The YAML to build from.
+        """
+        chunk_size = self.chunk_size or \
+            default_chunk_size(yaml, self.workers)
+        skeleton, partitions = partition_document(yaml, chunk_size)
+        with ProcessPoolExecutor(self.workers) as executor:
+            results = executor.map(build_partition,
+                                   [yaml for _, yaml in partitions])
+            self.build(skeleton)
+            main_document = self.output_documents.pop()
+
+            for (section, _), result in zip(partitions, results):
+                output_documents, refs, graph, main_yaml = result
+                self.output_documents.extend(output_documents)
+                self.refs.update(refs)
+                self.graph.merge(graph)
+                get_section(main_document.yaml, section).update(
+                    get_section(main_yaml, section))
+        self.output_documents.append(main_document)
 
     def preprocess_node(self, node: Node):
         """
@@ -90,7 +181,13 @@ class Splitter:
         elif node.kind == NodeKind.REF:
             self.process_ref_node(node)
         else:
-            pass
+            # Components of the families that are not split, e.g.
+            # responses, are graph nodes too so they can be pruned.
+            ref_path = component_entry_ref(node)
+            if ref_path:
+                self.graph.add_node(ref_path)
+            if node.name == "discriminator":
+                self.process_discriminator_node(node)
 
     def process_path_node(self, node: Node):
         # Replace {} with __
@@ -103,7 +200,7 @@ class Splitter:
 
         ref_path = "./" + document_path
         node.create_ref_node(ref_path)
-        pass
+        self.graph.add_node(path_ref(node.name))
 
     def process_components_schema_node(self, node: Node):
         path = "components/schemas/" + node.name
@@ -122,10 +219,38 @@ class Splitter:
         self.process_component_node(node, path)
 
     def process_ref_node(self, node: Node):
-        pass
+        target = ref_target(node.value)
+        if target:
+            self.graph.add_edge(self.find_ref_owner(node), target)
+
+    def process_discriminator_node(self, node: Node):
+        # Schemas only reached through a mapping are still used.
+        for ref in mapping_refs(node.source, names=True):
+            target = ref_target(ref)
+            if target:
+                self.graph.add_edge(self.find_ref_owner(node), target)
+
+    def find_ref_owner(self, node: Node) -> str:
+        """
+        Finds the path or the component containing a node.
+
+        :param node: The node.
+        :return: The graph node of the path or component, or the root for
+                 anything else.
+        """
+        current = node
+        while current:
+            if current.kind == NodeKind.PATH:
+                return path_ref(current.name)
+            ref_path = component_entry_ref(current)
+            if ref_path:
+                return ref_path
+            current = current.parent
+        return ROOT
 
     def process_component_node(self, node: Node, path):
         ref_path = "#/" + path
+        self.graph.add_node(ref_path)
         if ref_path not in self.refs:
             document_path = path + ".yaml"
             ref = Ref(ref_path, node, document_path)
@@ -139,36 +264,133 @@ class Splitter:
             ref = self.refs[ref_path]
             node.create_ref_node(ref.filename)
 
+    def prune_unreachable_components(self):
+        """
+        Removes the components that can not be reached from the paths or
+        from the rest of the main document, i.e. the component documents
+        and the entries of the families that are not split.
+
+        Security schemes are always kept, since they are referenced by name
+        instead of with $ref.
+        """
+        roots = [node for node in self.graph.edges
+                 if node == ROOT or node.startswith("#/paths/") or
+                 node.startswith("#/components/securitySchemes/")]
+        reachable = self.graph.reachable(roots)
+        main_document = self.output_documents[-1]
+        components = main_document.yaml.get("components")
+        if not isinstance(components, dict):
+            return
+
+        pruned_names = {}
+        for node in self.graph.edges:
+            if node in reachable or not node.startswith("#/components/"):
+                continue
+            _, _, family, name = node.split("/", 3)
+            entries = components.get(family)
+            # Dangling references are graph nodes too.
+            if isinstance(entries, dict) and name in entries:
+                self.pruned.append(node)
+                pruned_names.setdefault(family, set()).add(name)
+        if not self.pruned:
+            return
+
+        filenames = {self.refs[path].filename for path in self.pruned
+                     if path in self.refs}
+        self.output_documents = [
+            output_document for output_document in self.output_documents
+            if output_document.filename not in filenames]
+        for path in self.pruned:
+            self.refs.pop(path, None)
+
+        # The main document may share containers with the input, so the
+        # changed ones are copied.
+        components = dict(components)
+        for family, names in pruned_names.items():
+            entries = {name: value
+                       for name, value in components[family].items()
+                       if name not in names}
+            if entries:
+                components[family] = entries
+            else:
+                del components[family]
+        main_document.yaml = dict(main_document.yaml)
+        main_document.yaml["components"] = components
+
     def fix_local_references_in_output_documents(self):
         """
         This will detect any local references, i.e. references that are
         started with #, and change them with location to the output document.
         """
         for output_document in self.output_documents:
-            yaml = output_document.yaml
-            filename = output_document.filename
-            self.fix_local_references_in_yaml(yaml, filename)
+            output_document.yaml = self.fix_local_references_in_yaml(
+                output_document.yaml,
+                output_document.filename)
 
-    def fix_local_references_in_yaml(self, yaml: dict, src_filename: str):
+    def fix_local_references_in_yaml(self, yaml, src_filename: str):
         """
         This will detect any local references, i.e. references that are
         started with #, and change them with location to the output document.
 
+        The YAML is not modified in place. Containers are only copied along
+        the paths that lead to a changed reference, anything else is shared
+        with the input.
+
         :param yaml: The YAML to fix.
+        :return: The fixed YAML.
         """
         if isinstance(yaml, dict):
+            result = yaml
             for key, value in yaml.items():
-                if key == "$ref" and value.startswith("#"):
+                if key == "$ref" and isinstance(value, str) and \
+                        value.startswith("#"):
                     newvalue = \
                         self.replace_local_ref_with_target_ref(
                             value,
                             src_filename)
-                    yaml[key] = newvalue
+                elif key == "discriminator" and mapping_refs(value):
+                    newvalue = self.fix_local_references_in_discriminator(
+                        value, src_filename)
                 else:
-                    self.fix_local_references_in_yaml(value, src_filename)
+                    newvalue = self.fix_local_references_in_yaml(
+                        value, src_filename)
+                if newvalue is not value:
+                    if result is yaml:
+                        result = dict(yaml)
+                    result[key] = newvalue
+            return result
         elif isinstance(yaml, list):
-            for item in yaml:
-                self.fix_local_references_in_yaml(item, src_filename)
+            result = yaml
+            for index, item in enumerate(yaml):
+                newitem = self.fix_local_references_in_yaml(item,
+                                                            src_filename)
+                if newitem is not item:
+                    if result is yaml:
+                        result = list(yaml)
+                    result[index] = newitem
+            return result
+        return yaml
+
+    def fix_local_references_in_discriminator(self, discriminator: dict,
+                                              src_filename: str) -> dict:
+        """
+        Changes the local references in a discriminator mapping to the
+        output documents, like $ref values. Schema names are kept.
+
+        :param discriminator: The discriminator, it is not modified.
+        :return: The fixed discriminator.
+        """
+        mapping = {}
+        for key, value in discriminator["mapping"].items():
+            if isinstance(value, str) and value.startswith("#"):
+                value = self.replace_local_ref_with_target_ref(value,
+                                                               src_filename)
+            mapping[key] = value
+        if mapping == discriminator["mapping"]:
+            return discriminator
+        result = dict(discriminator)
+        result["mapping"] = mapping
+        return result
 
     def replace_local_ref_with_target_ref(self,
                                           local_ref: str,
@@ -198,3 +420,115 @@ def create_relative_path(src: str, dest: str) -> str:
     # print("\tpath\n\t\t{}\n\t\t{}\n\t\t{}".format(src_abs_path,
     #                                               dest_abs_path, result))
     return result
+
+
+def partition_document(yaml: dict, chunk_size: int = 0) -> tuple:
+    """
+    Partitions the split sections of the document.
+
+    :param yaml: The document.
+    :param chunk_size: The number of entries per partition, 0 for one
+                       partition per section.
+    :return: The document with the partitioned sections emptied, and the
+             list of (section, partition document) in document order.
+    """
+    skeleton = dict(yaml)
+    partitions = []
+    for section in SPLIT_SECTIONS:
+        entries = get_section(yaml, section)
+        if not isinstance(entries, dict) or not entries:
+            continue
+        if len(section) > 1:
+            skeleton[section[0]] = dict(skeleton[section[0]])
+        get_section(skeleton, section[:-1])[section[-1]] = {}
+
+        items = list(entries.items())
+        size = chunk_size if chunk_size > 0 else len(items)
+        for start in range(0, len(items), size):
+            partition = dict(items[start:start + size])
+            for key in reversed(section):
+                partition = {key: partition}
+            partitions.append((section, partition))
+
+    # Keep the partitions in the order the sections appear in the document.
+    partitions.sort(key=lambda partition: section_position(yaml,
+                                                           partition[0]))
+    return skeleton, partitions
+
+
+def default_chunk_size(yaml: dict, workers: int) -> int:
+    """
+    Returns a chunk size that gives every worker about TASKS_PER_WORKER
+    partitions, whatever the number of sections.
+
+    :param yaml: The document.
+    :param workers: The number of worker processes.
+    """
+    entries = 0
+    for section in SPLIT_SECTIONS:
+        section_entries = get_section(yaml, section)
+        if isinstance(section_entries, dict):
+            entries += len(section_entries)
+    tasks = max(workers, 1) * TASKS_PER_WORKER
+    return max(1, -(-entries // tasks))
+
+
+def section_position(yaml: dict, section: tuple) -> list[int]:
+    """
+    Returns the position of the section in the document, as the index of
+    each key in its parent.
+
+    :param yaml: The document.
+    :param section: The key path from the document root.
+    """
+    position = []
+    for key in section:
+        position.append(list(yaml).index(key))
+        yaml = yaml[key]
+    return position
+
+
+def get_section(yaml: dict, section: tuple):
+    """
+    Returns the value at the key path, or None if it does not exist.
+
+    :param yaml: The document.
+    :param section: The key path from the document root.
+    """
+    for key in section:
+        if not isinstance(yaml, dict):
+            return None
+        yaml = yaml.get(key)
+    return yaml
+
+
+def component_entry_ref(node: Node) -> str:
+    """
+    Returns the local reference of a component of any family.
+
+    :param node: The node.
+    :return: The reference, e.g. #/components/responses/NotFound, or None
+             if the node is not a component.
+    """
+    family = node.parent
+    if family and family.parent and \
+            family.parent.kind == NodeKind.COMPONENTS_ROOT:
+        return f"#/components/{family.name}/{node.name}"
+    return None
+
+
+def build_partition(yaml: dict) -> tuple:
+    """
+    Builds a partition of the document. This runs in a worker process.
+
+    :param yaml: The partition document.
+    :return: The output documents without the main document, the references
+             without their nodes, the reference graph and the main document.
+    """
+    splitter = Splitter(yaml, "")
+    splitter.build(yaml)
+    main_document = splitter.output_documents.pop()
+    refs = {path: Ref(ref.path, None, ref.filename)
+            for path, ref in splitter.refs.items()}
+    return splitter.output_documents, refs, splitter.graph, \
+        main_document.yaml
@@ -0,0 +1,247 @@
+"""
+This module verifies that the references between the output documents
+resolve.
+"""
+
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .graph import RefGraph, collect_refs
+from .io import read_yaml_from_file
+from .splitter import OutputDocument
+from .writer import STAGING_PREFIX
+
+# Extensions of the files indexed when verifying an output directory.
+YAML_EXTENSIONS = (".yaml", ".yml")
+
+# Marker for JSON pointers that do not resolve and files that do not parse,
+# since None is a valid value.
+NOT_FOUND = object()
+
+
+@dataclass
+class VerifyReport:
+    """
+    This class represents the result of a verification.
+
+    Cycles are reported but do not fail the verification, since recursive
+    schemas are valid. Names that only differ in case are reported too, but
+    only break on case-insensitive file systems.
+    """
+    documents: int = 0
+    refs: int = 0
+    # (source document, reference) of the references that do not resolve.
+    dangling: list[tuple[str, str]] = field(default_factory=list)
+    # Documents produced more than once under the same filename.
+    duplicates: list[str] = field(default_factory=list)
+    # Groups of documents whose filenames only differ in case.
+    case_collisions: list[list[str]] = field(default_factory=list)
+    # Groups of documents that reference each other.
+    cycles: list[list[str]] = field(default_factory=list)
+    # Documents that are not valid YAML.
+    invalid: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.dangling and not self.duplicates and \
+            not self.invalid
+
+    def __str__(self):
+        lines = [f"Verified {self.documents} documents, "
+                 f"{self.refs} references."]
+        if self.invalid:
+            lines.append(f"Invalid YAML files ({len(self.invalid)}):")
+            for filename in self.invalid:
+                lines.append(f"  {filename}")
+        if self.dangling:
+            lines.append(f"Dangling references ({len(self.dangling)}):")
+            for filename, ref in self.dangling:
+                lines.append(f"  {filename}: {ref}")
+        if self.duplicates:
+            lines.append(f"Duplicate documents ({len(self.duplicates)}):")
+            for filename in self.duplicates:
+                lines.append(f"  {filename}")
+        if self.case_collisions:
+            lines.append("Warning, names that collide on case-insensitive "
+                         f"file systems ({len(self.case_collisions)}):")
+            for filenames in self.case_collisions:
+                lines.append("  " + ", ".join(filenames))
+        if self.cycles:
+            lines.append(f"Cycles ({len(self.cycles)}):")
+            for cycle in self.cycles:
+                lines.append("  " + " -> ".join(cycle + cycle[:1]))
+        return "\n".join(lines)
+
+
+def verify_output_documents(output_documents: list[OutputDocument],
+                            workers: int = None) -> VerifyReport:
+    """
+    Verifies the output documents in memory, e.g. Splitter.output_documents.
+
+    :param output_documents: The documents to verify.
+    :param workers: The number of threads, defaults to the number of CPUs.
+    """
+    documents = [(posixpath.normpath(output_document.filename),
+                  output_document.yaml)
+                 for output_document in output_documents]
+    return verify_documents(documents, workers)
+
+
+def verify_output_dir(output_dir: str, workers: int = None) -> VerifyReport:
+    """
+    Verifies the YAML files of an output directory.
+
+    :param output_dir: The output directory.
+    :param workers: The number of threads, defaults to the number of CPUs.
+    """
+    filenames = []
+    for directory, subdirectories, files in os.walk(output_dir):
+        # Skip what an interrupted write left behind.
+        subdirectories[:] = [name for name in subdirectories
+                             if not name.startswith(STAGING_PREFIX)]
+        relative = os.path.relpath(directory, output_dir)
+        for name in files:
+            if name.endswith(YAML_EXTENSIONS):
+                path = os.path.join(relative, name)
+                filenames.append(posixpath.normpath(
+                    path.replace(os.sep, "/")))
+    filenames.sort()
+
+    def read_document(filename):
+        try:
+            return read_yaml_from_file(os.path.join(output_dir, filename))
+        except ValueError:
+            return NOT_FOUND
+
+    with ThreadPoolExecutor(workers) as executor:
+        yamls = list(executor.map(read_document, filenames))
+    documents = [(filename, yaml) for filename, yaml in zip(filenames, yamls)
+                 if yaml is not NOT_FOUND]
+    report = verify_documents(documents, workers)
+    # Invalid files are left out of the index, so references to them are
+    # reported as dangling too.
+    report.invalid = [filename for filename, yaml in zip(filenames, yamls)
+                      if yaml is NOT_FOUND]
+    report.documents += len(report.invalid)
+    return report
+
+
+def verify_documents(documents: list[tuple[str, object]],
+                     workers: int = None) -> VerifyReport:
+    """
+    Indexes the documents and resolves all of their references.
+
+    :param documents: The (normalized filename, YAML) of every document.
+    :param workers: The number of threads, defaults to the number of CPUs.
+    """
+    report = VerifyReport(documents=len(documents))
+
+    index = {}
+    by_folded_name = {}
+    for filename, yaml in documents:
+        if filename in index:
+            if filename not in report.duplicates:
+                report.duplicates.append(filename)
+            continue
+        index[filename] = yaml
+        by_folded_name.setdefault(filename.casefold(), []).append(filename)
+    report.case_collisions = [filenames
+                              for filenames in by_folded_name.values()
+                              if len(filenames) > 1]
+
+    def resolve_document(document):
+        filename, yaml = document
+        refs = collect_refs(yaml)
+        targets = []
+        dangling = []
+        for ref in refs:
+            if "://" in ref:
+                # References to other servers are not checked.
+                continue
+            target = resolve_ref(index, filename, ref)
+            if target is None:
+                dangling.append((filename, ref))
+            elif not ref.startswith("#"):
+                targets.append(target)
+        return filename, len(refs), targets, dangling
+
+    graph = RefGraph()
+    with ThreadPoolExecutor(workers) as executor:
+        for filename, ref_count, targets, dangling in \
+                executor.map(resolve_document, documents):
+            report.refs += ref_count
+            report.dangling.extend(dangling)
+            graph.add_node(filename)
+            for target in targets:
+                graph.add_edge(filename, target)
+    report.cycles = graph.cycles()
+    return report
+
+
+def resolve_ref(index: dict, src_filename: str, ref: str) -> str:
+    """
+    Resolves a reference against the index.
+
+    :param index: The YAML of the documents by normalized filename.
+    :param src_filename: The document containing the reference.
+    :param ref: The reference, e.g. ./components/schemas/Pet.yaml#/items.
+    :return: The filename of the target document, or None if it does not
+             resolve.
+    """
+    file_part, _, pointer = ref.partition("#")
+    if file_part:
+        target = posixpath.normpath(posixpath.join(
+            posixpath.dirname(src_filename), file_part))
+    else:
+        target = src_filename
+    if target not in index:
+        return None
+    if pointer and resolve_pointer(index[target], pointer) is NOT_FOUND:
+        return None
+    return target
+
+
+def resolve_pointer(yaml, pointer: str):
+    """
+    Resolves a JSON pointer, e.g. /components/schemas/Pet.
+
+    :param yaml: The document.
+    :param pointer: The pointer, without the leading #.
+    :return: The value, or NOT_FOUND.
+    """
+    if not pointer.startswith("/"):
+        return NOT_FOUND
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(yaml, dict) and token in yaml:
+            yaml = yaml[token]
+        elif isinstance(yaml, dict):
+            # Keys like response codes may have been loaded as numbers, or
+            # booleans and nulls as true, false and null.
+            keys = [key for key in yaml
+                    if not isinstance(key, str) and
+                    represent_key(key) == token]
+            if not keys:
+                return NOT_FOUND
+            yaml = yaml[keys[0]]
+        elif isinstance(yaml, list) and token.isdigit() and \
+                int(token) < len(yaml):
+            yaml = yaml[int(token)]
+        else:
+            return NOT_FOUND
+    return yaml
+
+
+def represent_key(key) -> str:
+    """
+    Returns a non-string key as it is written in a JSON pointer.
+
+    :param key: The key, e.g. 200, True or None.
+    """
+    if key is None:
+        return "null"
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    return str(key)
@@ -0,0 +1,459 @@
+"""
+This module contains the OutputWriter class that writes the output documents
+to the output directory.
+"""
+
+import os
+import shutil
+import socket
+import tempfile
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+import yaml
+
+from .emitter import YamlEmitter
+from .io import default_emitter
+from .splitter import OutputDocument
+from .verbose import vprint
+
+# Whether files and directories can be created relative to directory file
+# descriptors on this platform.
+SUPPORTS_DIR_FD = os.open in os.supports_dir_fd and \
+    os.mkdir in os.supports_dir_fd
+
+DIRECTORY_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+# Prefix of the staging directories created inside the output directory.
+STAGING_PREFIX = ".openapi-splitter-staging-"
+
+# The document published last, so its presence marks a complete output.
+MAIN_DOCUMENT = "main.yaml"
+
+# Files in the staging directory with the host and the process id of the
+# writer, and with the entries being published.
+OWNER_FILE = ".owner"
+PUBLISH_FILE = ".publish"
+
+# Seconds after which a staging directory whose writer can not be checked,
+# e.g. one on another host, is considered abandoned.
+STALE_AGE = 60 * 60
+
+
+class DurabilityPolicy(Enum):
+    """
+    How the written files are flushed to disk before they are published.
+    """
+    # Leave flushing to the operating system.
+    NONE = "none"
+    # Fsync every file when it is written and every directory when its
+    # files are written.
+    FILE = "file"
+    # Fsync every file, then every directory, once all of them are written,
+    # so the kernel can write them back in the meantime.
+    DIRECTORY = "directory"
+
+
+@dataclass
+class WriteStats:
+    """
+    This class represents the statistics of writing the output documents.
+    """
+    documents: int = 0
+    directories: int = 0
+    syncs: int = 0
+    # Directory syscalls issued: mkdir, open and close of every directory.
+    directory_syscalls: int = 0
+    # Directory syscalls of calling os.makedirs for every document instead.
+    makedirs_syscalls: int = 0
+
+    @property
+    def syscalls_saved(self) -> int:
+        """
+        The number of directory syscalls saved compared to calling
+        os.makedirs for the directory of every document.
+        """
+        return self.makedirs_syscalls - self.directory_syscalls
+
+    def __str__(self):
+        return f"Wrote {self.documents} files in {self.directories} " \
+            f"directories, {self.directory_syscalls} directory syscalls " \
+            f"instead of {self.makedirs_syscalls} " \
+            f"({self.syscalls_saved} saved)."
+
+
+@dataclass
+class OutputWriter:
+    """
+    This class writes the output documents to the output directory.
+
+    The documents are written to a staging directory inside the output
+    directory, which is then published by renaming its top-level entries,
+    main.yaml last. An interrupted write leaves the output directory as it
+    was. If the process is killed, the staging directory and the entries it
+    already published are removed by the next write, or by
+    remove_stale_staging_dirs.
+
+    Every directory is created once, parents first, and its files are
+    opened relative to the file descriptor of the directory, so the path is
+    not resolved again for every document. The directories are walked depth
+    first and only the descriptors of the current directory and its
+    ancestors are open at a time, so the number of open files is bounded by
+    the nesting depth rather than the number of directories.
+    """
+    output_dir: str = None
+    emitter: YamlEmitter = None
+    verbose: bool = False
+    durability: DurabilityPolicy = DurabilityPolicy.NONE
+
+    def __init__(self, output_dir: str, emitter: YamlEmitter = None,
+                 verbose: bool = False,
+                 durability: DurabilityPolicy = DurabilityPolicy.NONE):
+        self.output_dir = output_dir
+        self.emitter = emitter if emitter else default_emitter
+        self.verbose = verbose
+        self.durability = durability
+        if durability != DurabilityPolicy.NONE and not SUPPORTS_DIR_FD:
+            raise ValueError(f"Durability policy {durability.value} is not "
+                             "supported on this platform, directories can "
+                             "not be synced.")
+
+    def write(self, output_documents: list[OutputDocument]) -> WriteStats:
+        """
+        Writes the output documents.
+
+        :param output_documents: The documents to write.
+        :return: The statistics of the write.
+        """
+        directories = collect_directories(output_documents)
+        stats = WriteStats(len(output_documents), len(directories))
+        stats.makedirs_syscalls = count_makedirs_syscalls(output_documents)
+
+        remove_stale_staging_dirs(self.output_dir)
+        staging_dir = tempfile.mkdtemp(prefix=STAGING_PREFIX,
+                                       dir=self.output_dir)
+        published = []
+        try:
+            with open(os.path.join(staging_dir, OWNER_FILE), 'w') as stream:
+                stream.write(f"{socket.gethostname()} {os.getpid()}\n")
+            self.write_staging(staging_dir, directories, output_documents,
+                               stats)
+            self.publish(staging_dir, top_level_names(output_documents),
+                         published, stats)
+        except BaseException:
+            # Also on KeyboardInterrupt, so Ctrl-C leaves the output
+            # directory as it was.
+            for name in published:
+                remove_entry(os.path.join(self.output_dir, name))
+            raise
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return stats
+
+    def write_staging(self, staging_dir: str, directories: list[str],
+                      output_documents: list[OutputDocument],
+                      stats: WriteStats):
+        """
+        Writes the output documents to the staging directory and flushes
+        them according to the durability policy.
+
+        :param staging_dir: The staging directory.
+        :param directories: The directories to create, parents first.
+        :param output_documents: The documents to write.
+        :param stats: The statistics to count the syscalls in.
+        """
+        documents_by_directory = {}
+        for output_document in output_documents:
+            directory = os.path.dirname(output_document.filename)
+            documents_by_directory.setdefault(directory, []).append(
+                output_document)
+
+        # (directory, file descriptor) of the current directory and its
+        # ancestors.
+        open_dirs = []
+        try:
+            if SUPPORTS_DIR_FD:
+                open_dirs.append(("", os.open(staging_dir, DIRECTORY_FLAGS)))
+                stats.directory_syscalls += 1
+            for directory in [""] + directories:
+                if directory:
+                    parent = os.path.dirname(directory)
+                    while open_dirs and open_dirs[-1][0] != parent:
+                        self.close_directory(open_dirs.pop(), stats)
+                    self.make_directory(staging_dir, directory, open_dirs,
+                                        stats)
+                dir_fd = open_dirs[-1][1] if open_dirs else None
+                for output_document in documents_by_directory.get(
+                        directory, []):
+                    self.write_document(staging_dir, output_document,
+                                        dir_fd)
+                    if self.durability == DurabilityPolicy.FILE:
+                        stats.syncs += 1
+            while open_dirs:
+                self.close_directory(open_dirs.pop(), stats)
+        finally:
+            for _, fd in open_dirs:
+                os.close(fd)
+
+        if self.durability == DurabilityPolicy.DIRECTORY:
+            for output_document in output_documents:
+                sync_path(os.path.join(staging_dir, output_document.filename),
+                          os.O_WRONLY)
+            for directory in reversed([""] + directories):
+                sync_path(os.path.join(staging_dir, directory),
+                          DIRECTORY_FLAGS)
+            stats.syncs += len(output_documents) + len(directories) + 1
+
+    def close_directory(self, open_dir: tuple[str, int], stats: WriteStats):
+        """
+        Closes a directory whose files and subdirectories are written,
+        syncing it first if the durability policy asks for it.
+
+        :param open_dir: The directory and its file descriptor.
+        :param stats: The statistics to count the syscalls in.
+        """
+        _, fd = open_dir
+        try:
+            if self.durability == DurabilityPolicy.FILE:
+                os.fsync(fd)
+                stats.syncs += 1
+        finally:
+            os.close(fd)
+            stats.directory_syscalls += 1
+
+    def publish(self, staging_dir: str, names: list[str],
+                published: list[str], stats: WriteStats):
+        """
+        Moves the top-level entries of the staging directory into the output
+        directory. The entries are listed in the staging directory first, so
+        a publish that was killed halfway can be rolled back.
+
+        :param staging_dir: The staging directory.
+        :param names: The entries to move, main.yaml last.
+        :param published: The list to add the moved entries to.
+        :param stats: The statistics to count the syncs in.
+        """
+        with open(os.path.join(staging_dir, PUBLISH_FILE), 'w') as stream:
+            stream.writelines(name + "\n" for name in names)
+            if self.durability != DurabilityPolicy.NONE:
+                stream.flush()
+                os.fsync(stream.fileno())
+                stats.syncs += 1
+        for name in names:
+            target = os.path.join(self.output_dir, name)
+            if os.path.lexists(target):
+                raise ValueError(f"Output {target} already exists.")
+            os.rename(os.path.join(staging_dir, name), target)
+            published.append(name)
+
+        if self.durability != DurabilityPolicy.NONE:
+            sync_path(self.output_dir, DIRECTORY_FLAGS)
+            stats.syncs += 1
+
+    def make_directory(self, root_dir: str, directory: str,
+                       open_dirs: list[tuple[str, int]], stats: WriteStats):
+        """
+        Creates a directory whose parent is the last open directory, and
+        opens it.
+
+        :param root_dir: The directory the documents are written to.
+        :param directory: The directory, relative to the root directory.
+        :param open_dirs: The open directories, the parent last.
+        :param stats: The statistics to count the syscalls in.
+        """
+        if not SUPPORTS_DIR_FD:
+            os.makedirs(os.path.join(root_dir, directory), exist_ok=True)
+            stats.directory_syscalls += 1
+            return
+        name = os.path.basename(directory)
+        parent_fd = open_dirs[-1][1]
+        try:
+            os.mkdir(name, dir_fd=parent_fd)
+        except FileExistsError:
+            pass
+        open_dirs.append((directory, os.open(name, DIRECTORY_FLAGS,
+                                             dir_fd=parent_fd)))
+        stats.directory_syscalls += 2
+
+    def write_document(self, root_dir: str, output_document: OutputDocument,
+                       dir_fd: int = None):
+        """
+        Writes a document into its already created directory.
+
+        :param root_dir: The directory the documents are written to.
+        :param output_document: The document to write.
+        :param dir_fd: The file descriptor of the directory of the
+                       document, None to open it by path.
+        """
+        file_path = self.output_dir + "/" + output_document.filename
+        vprint(self.verbose, "Writing file: {}".format(file_path))
+
+        if dir_fd is not None:
+            name = os.path.basename(output_document.filename)
+            fd = os.open(name, FILE_FLAGS, 0o666, dir_fd=dir_fd)
+        else:
+            fd = os.open(root_dir + "/" + output_document.filename,
+                         FILE_FLAGS, 0o666)
+        with open(fd, 'w') as stream:
+            try:
+                self.emitter.emit(output_document.yaml, stream)
+            except yaml.YAMLError as exc:
+                raise ValueError("Invalid YAML file") from exc
+            if self.durability == DurabilityPolicy.FILE:
+                stream.flush()
+                os.fsync(fd)
+
+
+def collect_directories(output_documents: list[OutputDocument]) -> list[str]:
+    """
+    Collects the directories of the output documents and their ancestors.
+
+    :param output_documents: The output documents.
+    :return: The directories relative to the output directory, in depth
+             first order.
+    """
+    directories = set()
+    for output_document in output_documents:
+        directory = os.path.dirname(output_document.filename)
+        while directory and directory not in directories:
+            directories.add(directory)
+            directory = os.path.dirname(directory)
+    # Sorting by components keeps every subtree together, unlike sorting
+    # the strings, where paths/a-b sorts between paths/a and paths/a/b.
+    return sorted(directories, key=lambda directory: directory.split("/"))
+
+
+def count_makedirs_syscalls(output_documents: list[OutputDocument]) -> int:
+    """
+    Counts the directory syscalls of calling os.makedirs(exist_ok=True) for
+    the directory of every document.
+
+    :param output_documents: The output documents.
+    """
+    existing = set()
+    return sum(makedirs_syscalls(os.path.dirname(output_document.filename),
+                                 existing)
+               for output_document in output_documents)
+
+
+def makedirs_syscalls(directory: str, existing: set[str]) -> int:
+    """
+    Counts the syscalls of one os.makedirs call: a stat of the parent, the
+    calls for a missing parent, a mkdir and, if the directory exists, a
+    stat to check that it is a directory.
+
+    :param directory: The directory, "" for the output directory itself.
+    :param existing: The directories created so far, updated in place.
+    """
+    count = 1
+    parent = os.path.dirname(directory)
+    if directory and parent and parent not in existing:
+        count += makedirs_syscalls(parent, existing)
+    count += 1
+    if directory in existing or not directory:
+        count += 1
+    existing.add(directory)
+    return count
+
+
+def sync_path(path: str, flags: int):
+    """
+    Opens a file or a directory and fsyncs it.
+
+    :param path: The path.
+    :param flags: The flags to open the path with.
+    """
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def top_level_names(output_documents: list[OutputDocument]) -> list[str]:
+    """
+    Returns the top-level entries of the output documents, main.yaml last.
+
+    :param output_documents: The output documents.
+    """
+    names = {output_document.filename.split("/")[0]: None
+             for output_document in output_documents}
+    return sorted(names, key=lambda name: name == MAIN_DOCUMENT)
+
+
+def remove_stale_staging_dirs(output_dir: str):
+    """
+    Removes the staging directories left behind by killed writes. If a
+    write was killed while publishing, before main.yaml was moved, the
+    entries it already moved are removed too.
+
+    Staging directories of writes that may still be running are kept.
+
+    :param output_dir: The output directory.
+    """
+    with os.scandir(output_dir) as entries:
+        staging_dirs = [entry.path for entry in entries
+                        if entry.name.startswith(STAGING_PREFIX) and
+                        entry.is_dir(follow_symlinks=False)]
+    for staging_dir in staging_dirs:
+        if not is_stale(staging_dir):
+            continue
+        try:
+            with open(os.path.join(staging_dir, PUBLISH_FILE), 'r') as stream:
+                names = stream.read().splitlines()
+        except OSError:
+            names = []
+        if MAIN_DOCUMENT in names and not os.path.lexists(
+                os.path.join(output_dir, MAIN_DOCUMENT)):
+            for name in names:
+                # Entries still in the staging directory were not moved, so
+                # one in the output directory is not ours.
+                if not os.path.lexists(os.path.join(staging_dir, name)):
+                    remove_entry(os.path.join(output_dir, name))
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def is_stale(staging_dir: str) -> bool:
+    """
+    Determines if the writer of a staging directory is gone.
+
+    :param staging_dir: The staging directory.
+    """
+    try:
+        with open(os.path.join(staging_dir, OWNER_FILE), 'r') as stream:
+            host, pid = stream.read().split()
+        pid = int(pid)
+    except (OSError, ValueError):
+        host, pid = None, None
+    # Signal 0 is CTRL_C_EVENT on Windows, so processes are not checked
+    # there.
+    if host != socket.gethostname() or os.name == "nt":
+        try:
+            age = time.time() - os.stat(staging_dir).st_mtime
+        except OSError:
+            return False
+        return age > STALE_AGE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def remove_entry(path: str):
+    """
+    Removes a file or a directory tree, ignoring errors.
+
+    :param path: The path to remove.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,84 @@
+import unittest
+import os
+from dataclasses import dataclass
+import yaml
+from openapi_splitter.emitter import YamlEmitter, NoAliasSafeDumper, \
+    UnsupportedYamlError
+from openapi_splitter.io import read_yaml_from_file
+
+dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
+
+
+def safe_dump(data, indent=2, width=80):
+    return yaml.dump(data, Dumper=NoAliasSafeDumper, sort_keys=False,
+                     indent=indent, width=width)
+
+
+class TestEmitter(unittest.TestCase):
+    def test_dumps_samples(self):
+        test_files = [
+            "../res/samples/api-with-example.yaml",
+            "../res/samples/petstore-expanded.yaml",
+            "../res/samples/petstore-simple.yaml",
+            "../res/samples/petstore.yaml",
+        ]
+
+        emitter = YamlEmitter()
+        for test_file in test_files:
+            yaml_input = read_yaml_from_file(dir_path + test_file)
+            self.assertEqual(emitter.dumps(yaml_input),
+                             safe_dump(yaml_input),
+                             "failed {}".format(test_file))
+
+    def test_dumps(self):
+        @dataclass
+        class TestCase:
+            name: str
+            input: object
+            indent: int = 2
+            width: int = 80
+
+        long_text = "a long description that " * 6
+        document = {
+            "str": "value",
+            "quoted": ["true", "123", "", "it's", "- dash", "a: b"],
+            "scalars": [0, -1, 1.5, 1e17, float("inf"), None, True, False],
+            "keys": {200: "ok", "404": "missing", True: "yes", None: "no"},
+            "empty": {"map": {}, "list": []},
+            "nested": [[1, [2, 3]], {"a": [{"b": "c", "d": []}]}],
+            "long": long_text,
+            "long_quoted": "'" + long_text,
+            "long_word": "x" * 120,
+        }
+        test_cases = [
+            TestCase("empty map", {}),
+            TestCase("empty list", []),
+            TestCase("list root", [document, [document]]),
+            TestCase("default", document),
+            TestCase("indent 4", document, indent=4),
+            TestCase("width 40", document, width=40),
+            TestCase("indent 3 width 30", document, indent=3, width=30),
+        ]
+
+        for test_case in test_cases:
+            emitter = YamlEmitter(test_case.indent, test_case.width)
+            self.assertEqual(
+                emitter.render(test_case.input),
+                safe_dump(test_case.input, test_case.indent, test_case.width),
+                "failed {}".format(test_case.name))
+
+    def test_dumps_fallback(self):
+        test_cases = [
+            {"multiline": "line 1\nline 2"},
+            {"unicode": "café"},
+            {"tab": "a\tb"},
+            {"": "empty key"},
+            {"k" * 130: "long key"},
+            {"tuple": (1, 2)},
+        ]
+
+        emitter = YamlEmitter()
+        for test_case in test_cases:
+            with self.assertRaises(UnsupportedYamlError):
+                emitter.render(test_case)
+            self.assertEqual(emitter.dumps(test_case), safe_dump(test_case))
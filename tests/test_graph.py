@@ -0,0 +1,55 @@
+import unittest
+from openapi_splitter.graph import RefGraph, ref_target, path_ref
+
+
+class TestRefGraph(unittest.TestCase):
+    def create_graph(self) -> RefGraph:
+        graph = RefGraph()
+        graph.add_edge("#/paths/~1a", "#/components/schemas/A")
+        graph.add_edge("#/components/schemas/A", "#/components/schemas/B")
+        graph.add_edge("#/components/schemas/B", "#/components/schemas/A")
+        graph.add_edge("#/components/schemas/C", "#/components/schemas/C")
+        graph.add_edge("#/components/schemas/D", "#/components/schemas/A")
+        graph.add_node("#/components/schemas/E")
+        return graph
+
+    def test_reachable(self):
+        graph = self.create_graph()
+        self.assertEqual(graph.reachable(["#/paths/~1a"]), {
+            "#/paths/~1a",
+            "#/components/schemas/A",
+            "#/components/schemas/B",
+        })
+        self.assertEqual(graph.reachable(["#/unknown"]), set())
+
+    def test_fan_in_fan_out(self):
+        graph = self.create_graph()
+        fan_in = graph.fan_in()
+        fan_out = graph.fan_out()
+        self.assertEqual(fan_in["#/components/schemas/A"], 3)
+        self.assertEqual(fan_in["#/components/schemas/E"], 0)
+        self.assertEqual(fan_out["#/paths/~1a"], 1)
+        self.assertEqual(fan_out["#/components/schemas/E"], 0)
+
+    def test_cycles(self):
+        graph = self.create_graph()
+        self.assertEqual(graph.cycles(), [
+            ["#/components/schemas/A", "#/components/schemas/B"],
+            ["#/components/schemas/C"],
+        ])
+
+    def test_merge(self):
+        graph = RefGraph()
+        graph.add_edge("#", "#/components/schemas/Z")
+        graph.merge(self.create_graph())
+        self.assertEqual(len(graph.edges), 8)
+        self.assertIn("#/components/schemas/B",
+                      graph.edges["#/components/schemas/A"])
+
+    def test_ref_target(self):
+        self.assertEqual(ref_target("#/components/schemas/A/properties/b"),
+                         "#/components/schemas/A")
+        self.assertEqual(ref_target("#/paths/~1a/get"), "#/paths/~1a")
+        self.assertEqual(ref_target("#/info"), "#")
+        self.assertIsNone(ref_target("./other.yaml#/A"))
+        self.assertEqual(path_ref("/a/{b}"), "#/paths/~1a~1{b}")
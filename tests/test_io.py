@@ -3,10 +3,13 @@
 """
 
 import unittest
+import io
 import os
 from dataclasses import dataclass
 import tempfile
-from openapi_splitter.io import read_yaml_from_file, write_yaml_to_file
+import yaml
+from openapi_splitter.io import read_yaml_from_file, write_yaml_to_file, \
+    read_yaml_from_stream
 
 
 dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
@@ -48,3 +51,68 @@ class TestIO(unittest.TestCase):
             write_yaml_to_file(temp.name, yaml)
             new_yaml = read_yaml_from_file(temp.name)
             self.assertTrue(isinstance(new_yaml, dict))
+
+    def test_write_yaml_to_file_mode(self):
+        umask = os.umask(0o027)
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                file = temp_dir + "/a/b.yaml"
+                write_yaml_to_file(file, {"a": 1})
+                write_yaml_to_file(file, {"a": 2})
+                self.assertEqual(os.stat(file).st_mode & 0o777, 0o640)
+                self.assertEqual(read_yaml_from_file(file), {"a": 2})
+                self.assertEqual(os.listdir(temp_dir + "/a"), ["b.yaml"])
+        finally:
+            os.umask(umask)
+
+    def test_read_yaml_from_file_encodings(self):
+        test_file = dir_path + "../res/samples/petstore.yaml"
+        expected = read_yaml_from_file(test_file)
+        with open(test_file, 'r') as stream:
+            text = stream.read()
+
+        encodings = ["utf-8", "utf-8-sig", "utf-16", "utf-16-le",
+                     "utf-16-be", "utf-32", "utf-32-le", "utf-32-be"]
+        for encoding in encodings:
+            with tempfile.NamedTemporaryFile(delete=False) as temp:
+                temp.write(text.encode(encoding))
+            try:
+                actual = read_yaml_from_file(temp.name)
+            finally:
+                os.unlink(temp.name)
+            self.assertEqual(actual, expected, "failed {}".format(encoding))
+
+    def test_read_yaml_from_file_empty(self):
+        with tempfile.NamedTemporaryFile(delete=False) as temp:
+            pass
+        try:
+            self.assertIsNone(read_yaml_from_file(temp.name))
+        finally:
+            os.unlink(temp.name)
+
+    def test_read_yaml_from_stream(self):
+        stream = io.BytesIO(b"a:\n  - 1\n  - b\n")
+        self.assertEqual(read_yaml_from_stream(stream), {"a": [1, "b"]})
+
+        with self.assertRaises(yaml.YAMLError):
+            read_yaml_from_stream(io.BytesIO(b"a: [1"))
+
+    @unittest.skipUnless(os.path.isdir("/dev/fd"), "requires /dev/fd")
+    def test_read_yaml_from_pipe(self):
+        test_cases = [
+            (b"a:\n  - 1\n  - b\n", {"a": [1, "b"]}),
+            (b"a: [1", None),
+        ]
+        for data, expected in test_cases:
+            read_fd, write_fd = os.pipe()
+            try:
+                os.write(write_fd, data)
+                os.close(write_fd)
+                file = f"/dev/fd/{read_fd}"
+                if expected is None:
+                    with self.assertRaises(ValueError):
+                        read_yaml_from_file(file)
+                else:
+                    self.assertEqual(read_yaml_from_file(file), expected)
+            finally:
+                os.close(read_fd)
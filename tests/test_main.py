@@ -1,6 +1,9 @@
 import unittest
 import os
+import tempfile
+import time
 from openapi_splitter.main import validate_input_file, validate_output_dir
+from openapi_splitter.writer import STAGING_PREFIX, STALE_AGE
 
 dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
 
@@ -19,6 +22,25 @@ class TestCommand(unittest.TestCase):
         with self.assertRaises(ValueError):
             validate_input_file("/usr/bin")
 
+        # Test case for when file is a device that may never end
+        if os.path.exists("/dev/zero"):
+            with self.assertRaises(ValueError):
+                validate_input_file("/dev/zero")
+
+        # Test case for when file is a pipe
+        if hasattr(os, "mkfifo"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                fifo = temp_dir + "/input.yaml"
+                os.mkfifo(fifo)
+                validate_input_file(fifo)
+        read_fd, write_fd = os.pipe()
+        try:
+            if os.path.isdir("/dev/fd"):
+                validate_input_file(f"/dev/fd/{read_fd}")
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
         # Test case for when file is valid
         valid_input_file = dir_path + \
             "/../res/samples/petstore-simple.yaml"
@@ -41,3 +63,14 @@ class TestCommand(unittest.TestCase):
         # Testcase for when directory is not empty
         with self.assertRaises(ValueError):
             validate_output_dir(dir_path + "/../res/samples")
+
+        # Testcase for when directory only has a stale staging directory,
+        # which is left for the writer to remove
+        with tempfile.TemporaryDirectory() as temp_dir:
+            staging_dir = temp_dir + "/" + STAGING_PREFIX + "stale"
+            os.mkdir(staging_dir)
+            mtime = time.time() - STALE_AGE - 60
+            os.utime(staging_dir, (mtime, mtime))
+            validate_output_dir(temp_dir)
+            self.assertEqual(os.listdir(temp_dir),
+                             [STAGING_PREFIX + "stale"])
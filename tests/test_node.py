@@ -17,3 +17,30 @@ class TestNode(unittest.TestCase):
         node = Node(yaml_input)
         self.assertEqual(node.level, 0)
         self.assertEqual(len(node.children), 2)
+
+    def test_rebuild_children_yaml_falsy_values(self):
+        yaml_input = {
+            "list": ["a", 0, False, "", None, 0.0],
+            "null": None,
+            "empty_map": {},
+            "empty_list": [],
+        }
+        node = Node(yaml_input)
+        self.assertEqual(node.rebuild_children_yaml(), yaml_input)
+
+    def test_rebuild_children_yaml_reuses_clean_subtrees(self):
+        yaml_input = {
+            "clean": {"a": [1, 2, {"b": "c"}]},
+            "dirty": {"replaced": {"x": "y"}, "kept": {"z": 0}},
+        }
+        node = Node(yaml_input)
+        replaced = node.children[1].children[0]
+        replaced.create_ref_node("./replaced.yaml")
+
+        result = node.rebuild_children_yaml()
+        self.assertIs(result["clean"], yaml_input["clean"])
+        self.assertIs(result["dirty"]["kept"], yaml_input["dirty"]["kept"])
+        self.assertIsNot(result["dirty"], yaml_input["dirty"])
+        self.assertEqual(result["dirty"]["replaced"],
+                         {"$ref": "./replaced.yaml"})
+        self.assertEqual(yaml_input["dirty"]["replaced"], {"x": "y"})
@@ -0,0 +1,153 @@
+"""
+Performance tests, run with `make perf`.
+
+These split generated specifications of several sizes, fit the growth
+exponent of the run time and compare it, the run time and the peak memory
+of the largest size with the baselines in perf_baselines.json.
+"""
+
+import unittest
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import pytest
+from openapi_splitter.emitter import YamlEmitter
+from openapi_splitter.main import generate
+from openapi_splitter.splitter import Splitter
+
+dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
+
+SIZES = [250, 500, 1000, 2000]
+REPEAT = 3
+
+
+def generate_spec(size: int) -> dict:
+    """
+    Generates a specification with the given number of paths and schemas.
+    """
+    paths = {}
+    schemas = {}
+    for i in range(size):
+        paths[f"/items{i}/{{id}}"] = {"get": {
+            "summary": f"Get item {i}",
+            "tags": [f"tag{i % 10}"],
+            "parameters": [{"name": "id", "in": "path", "required": True,
+                            "schema": {"type": "integer"}}],
+            "responses": {"200": {
+                "description": "OK",
+                "content": {"application/json": {"schema": {
+                    "$ref": f"#/components/schemas/Item{i}"}}}}},
+        }}
+        schemas[f"Item{i}"] = {
+            "type": "object",
+            "required": ["id"],
+            "properties": {
+                "id": {"type": "integer", "format": "int64"},
+                "name": {"type": "string", "example": f"item {i}"},
+                "parent": {"$ref": f"#/components/schemas/Item{i // 2}"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+            },
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Generated", "version": "1.0.0"},
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def load_baseline() -> dict:
+    """
+    Loads the baseline of this machine class. The class can be set with the
+    PERF_MACHINE_CLASS environment variable and defaults to system-machine,
+    e.g. Linux-x86_64.
+    """
+    with open(dir_path + "perf_baselines.json", 'r') as stream:
+        baselines = json.load(stream)
+    machine_class = os.environ.get(
+        "PERF_MACHINE_CLASS",
+        f"{platform.system()}-{platform.machine()}")
+    return baselines.get(machine_class, baselines["default"])
+
+
+def fit_exponent(sizes: list[int], seconds: list[float]) -> float:
+    """
+    Fits seconds = c * size ^ k with least squares on the logarithms and
+    returns k.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(second) for second in seconds]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+    return numerator / denominator
+
+
+def best_time(function) -> float:
+    result = math.inf
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        result = min(result, time.perf_counter() - start)
+    return result
+
+
+def peak_memory_mb(function) -> float:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.perf
+class TestPerf(unittest.TestCase):
+    def assert_within_baseline(self, name: str, seconds: list[float],
+                               peak_mb: float):
+        baseline = load_baseline()[name]
+        exponent = fit_exponent(SIZES, seconds)
+        print(f"{name}: exponent {exponent:.2f}, "
+              f"{seconds[-1]:.3f}s and {peak_mb:.1f}MB at {SIZES[-1]}")
+        self.assertLessEqual(exponent, baseline["max_exponent"],
+                             f"{name} grows faster than the baseline")
+        self.assertLessEqual(seconds[-1], baseline["max_seconds"],
+                             f"{name} is slower than the baseline")
+        self.assertLessEqual(peak_mb, baseline["max_peak_mb"],
+                             f"{name} uses more memory than the baseline")
+
+    def test_split(self):
+        specs = [generate_spec(size) for size in SIZES]
+        seconds = [best_time(lambda: Splitter(spec, "").split())
+                   for spec in specs]
+        peak_mb = peak_memory_mb(lambda: Splitter(specs[-1], "").split())
+        self.assert_within_baseline("split", seconds, peak_mb)
+
+    def test_generate(self):
+        emitter = YamlEmitter()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_files = []
+            for size in SIZES:
+                input_file = f"{temp_dir}/spec{size}.yaml"
+                with open(input_file, 'w') as stream:
+                    emitter.emit(generate_spec(size), stream)
+                input_files.append(input_file)
+
+            runs = 0
+
+            def run(input_file):
+                nonlocal runs
+                runs += 1
+                output_dir = f"{temp_dir}/output{runs}"
+                os.mkdir(output_dir)
+                generate(input_file, output_dir)
+
+            seconds = [best_time(lambda: run(input_file))
+                       for input_file in input_files]
+            peak_mb = peak_memory_mb(lambda: run(input_files[-1]))
+        self.assert_within_baseline("generate", seconds, peak_mb)
@@ -0,0 +1,132 @@
+import unittest
+from dataclasses import dataclass
+from openapi_splitter.selector import Selector
+from openapi_splitter.splitter import Splitter
+
+
+def operation(tag: str, schema: str) -> dict:
+    return {"tags": [tag], "responses": {"200": {"content": {
+        "application/json": {"schema": {
+            "$ref": "#/components/schemas/" + schema}}}}}}
+
+
+class TestSelector(unittest.TestCase):
+    yaml = {
+        "openapi": "3.0.0",
+        "paths": {
+            "/billing/invoices": {
+                "get": operation("billing", "Invoice"),
+                "post": operation("admin", "Audit"),
+            },
+            "/billing/legacy": {"get": operation("billing", "Legacy")},
+            "/pets": {"get": operation("pets", "Pet")},
+        },
+        "components": {
+            "schemas": {
+                "Invoice": {"properties": {
+                    "lines": {"$ref": "#/components/schemas/Line"}}},
+                "Line": {"type": "object"},
+                "Audit": {"type": "object"},
+                "Legacy": {"type": "object"},
+                "Pet": {"type": "object"},
+                "BillingReport": {"type": "object"},
+            },
+            "securitySchemes": {"key": {"type": "apiKey"}},
+        },
+    }
+
+    def test_select(self):
+        @dataclass
+        class TestCase:
+            name: str
+            selector: Selector
+            expected_paths: list
+            expected_schemas: list
+            expected_operations: list = None
+
+        test_cases = [
+            TestCase("no filters", Selector(),
+                     ["/billing/invoices", "/billing/legacy", "/pets"],
+                     ["Invoice", "Line", "Audit", "Legacy", "Pet",
+                      "BillingReport"]),
+            TestCase("path glob", Selector(include_paths=["/billing/*"],
+                                           exclude_paths=["*/legacy"]),
+                     ["/billing/invoices"],
+                     ["Invoice", "Line", "Audit"]),
+            TestCase("tag", Selector(tags=["bill*"]),
+                     ["/billing/invoices", "/billing/legacy"],
+                     ["Invoice", "Line", "Legacy"],
+                     ["get"]),
+            TestCase("component", Selector(include_components=["Billing*"]),
+                     [],
+                     ["BillingReport"]),
+            TestCase("qualified component",
+                     Selector(include_components=["schemas/Inv*"]),
+                     [],
+                     ["Invoice", "Line"]),
+            TestCase("exclude component",
+                     Selector(exclude_components=["L*"]),
+                     ["/billing/invoices", "/billing/legacy", "/pets"],
+                     ["Invoice", "Line", "Audit", "Legacy", "Pet",
+                      "BillingReport"]),
+            TestCase("exclude unreferenced component",
+                     Selector(include_paths=["/pets"],
+                              include_components=["*"],
+                              exclude_components=["Billing*", "Legacy"]),
+                     ["/pets"],
+                     ["Invoice", "Line", "Audit", "Pet"]),
+        ]
+
+        for test_case in test_cases:
+            actual = test_case.selector.select(self.yaml)
+            self.assertEqual(list(actual["paths"]), test_case.expected_paths,
+                             "failed {}".format(test_case.name))
+            self.assertEqual(list(actual["components"]["schemas"]),
+                             test_case.expected_schemas,
+                             "failed {}".format(test_case.name))
+            self.assertEqual(actual["components"]["securitySchemes"],
+                             self.yaml["components"]["securitySchemes"])
+            if test_case.expected_operations:
+                self.assertEqual(list(actual["paths"]["/billing/invoices"]),
+                                 test_case.expected_operations)
+
+    def test_split_with_selector(self):
+        selector = Selector(include_paths=["/billing/invoices"])
+        splitter = Splitter(self.yaml, "", selector=selector)
+        splitter.split()
+        self.assertEqual(
+            [output_document.filename
+             for output_document in splitter.output_documents],
+            ["paths/billing/invoices/index.yaml",
+             "components/schemas/Invoice.yaml",
+             "components/schemas/Line.yaml",
+             "components/schemas/Audit.yaml",
+             "components/securitySchemes/key.yaml",
+             "main.yaml"])
+
+    def test_select_discriminator_mapping(self):
+        yaml = {
+            "paths": {
+                "/animals": {"get": operation("animals", "Animal")},
+                "/pets": {"get": operation("pets", "Pet")},
+            },
+            "components": {"schemas": {
+                "Animal": {"oneOf": [{"$ref": "#/components/schemas/Dog"}],
+                           "discriminator": {
+                               "propertyName": "kind",
+                               "mapping": {
+                                   "dog": "#/components/schemas/Dog",
+                                   "cat": "Cat",
+                                   "bird": "#/components/schemas/Bird",
+                               }}},
+                "Dog": {"type": "object"},
+                "Cat": {"type": "object"},
+                "Bird": {"$ref": "#/components/schemas/Wing"},
+                "Wing": {"type": "object"},
+                "Pet": {"type": "object"},
+            }},
+        }
+        selected = Selector(include_paths=["/animals"]).select(yaml)
+        self.assertEqual(list(selected["paths"]), ["/animals"])
+        self.assertEqual(list(selected["components"]["schemas"]),
+                         ["Animal", "Dog", "Cat", "Bird", "Wing"])
@@ -1,8 +1,11 @@
 import unittest
+import copy
 import os
 from dataclasses import dataclass
-from openapi_splitter.splitter import Splitter
+from openapi_splitter.splitter import Splitter, default_chunk_size, \
+    partition_document
 from openapi_splitter.io import read_yaml_from_file
+from openapi_splitter.verifier import verify_output_documents
 import tempfile
 
 dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
@@ -36,3 +39,189 @@ class TestSplitter(unittest.TestCase):
             # print(splitter.root)
             self.assertEqual(len(splitter.output_documents),
                              test_case.expected_output_document_count)
+
+    def test_split_does_not_modify_input(self):
+        file_path = dir_path + "../res/samples/petstore-expanded.yaml"
+        input_yaml = read_yaml_from_file(file_path)
+        expected_yaml = read_yaml_from_file(file_path)
+
+        splitter = Splitter(input_yaml, "")
+        splitter.split()
+        self.assertEqual(input_yaml, expected_yaml)
+
+    def test_split_parallel(self):
+        test_files = [
+            "../res/samples/api-with-example.yaml",
+            "../res/samples/petstore-expanded.yaml",
+            "../res/samples/petstore-simple.yaml",
+            "../res/samples/petstore.yaml",
+        ]
+        test_yamls = [read_yaml_from_file(dir_path + test_file)
+                      for test_file in test_files]
+        # Sections in a different order than the splitter looks them up.
+        reordered_yaml = read_yaml_from_file(dir_path + test_files[3])
+        components = reordered_yaml.pop("components")
+        components["securitySchemes"] = {"key": {"type": "apiKey",
+                                                 "name": "key",
+                                                 "in": "header"}}
+        components = dict(reversed(components.items()))
+        reordered_yaml = {"components": components, **reordered_yaml}
+        test_yamls.append(reordered_yaml)
+
+        for input_yaml in test_yamls:
+            expected = Splitter(input_yaml, "")
+            expected.split()
+            for chunk_size in [0, 1]:
+                actual = Splitter(input_yaml, "", workers=2,
+                                  chunk_size=chunk_size)
+                actual.split()
+                self.assertEqual(actual.output_documents,
+                                 expected.output_documents)
+                self.assertEqual(actual.refs.keys(), expected.refs.keys())
+
+    def test_split_prune(self):
+        input_yaml = {
+            "paths": {
+                "/a": {"get": {"responses": {"200": {
+                    "$ref": "#/components/responses/A"}}}},
+            },
+            "components": {
+                "responses": {"A": {"content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/A"}}}}},
+                "schemas": {
+                    "A": {"items": {"$ref": "#/components/schemas/B"}},
+                    "B": {"type": "string"},
+                    "Unused": {"$ref": "#/components/schemas/AlsoUnused"},
+                    "AlsoUnused": {"type": "string"},
+                },
+                "headers": {"Unused": {"schema": {"type": "string"}}},
+                "securitySchemes": {"key": {"type": "apiKey"}},
+            },
+        }
+
+        for workers in [1, 2]:
+            splitter = Splitter(input_yaml, "", workers=workers, prune=True)
+            splitter.split()
+            self.assertEqual(
+                [output_document.filename
+                 for output_document in splitter.output_documents],
+                ["paths/a/index.yaml",
+                 "components/schemas/A.yaml",
+                 "components/schemas/B.yaml",
+                 "components/securitySchemes/key.yaml",
+                 "main.yaml"])
+            self.assertEqual(sorted(splitter.pruned), [
+                "#/components/headers/Unused",
+                "#/components/schemas/AlsoUnused",
+                "#/components/schemas/Unused",
+            ])
+            components = splitter.output_documents[-1].yaml["components"]
+            self.assertEqual(list(components["schemas"]), ["A", "B"])
+            self.assertNotIn("headers", components)
+
+    def test_split_prune_unsplit_families(self):
+        input_yaml = {
+            "paths": {
+                "/a": {"post": {
+                    "requestBody": {"$ref": "#/components/requestBodies/A"},
+                    "responses": {"200": {
+                        "$ref": "#/components/responses/A"}}}},
+            },
+            "components": {
+                "responses": {
+                    "A": {"description": "A"},
+                    "Dead": {"content": {"application/json": {
+                        "schema": {"$ref": "#/components/schemas/Big"}}}},
+                    "Alias": {"$ref": "#/components/responses/Dead"},
+                },
+                "requestBodies": {
+                    "A": {"content": {"application/json": {
+                        "schema": {"$ref": "#/components/schemas/A"}}}},
+                    "Dead": {"content": {"application/json": {
+                        "schema": {"$ref": "#/components/schemas/Big"}}}},
+                },
+                "examples": {"Dead": {"value": 1}},
+                "schemas": {
+                    "A": {"type": "string"},
+                    "Big": {"items": {"$ref": "#/components/schemas/A"}},
+                },
+            },
+        }
+        expected = copy.deepcopy(input_yaml)
+
+        for workers in [1, 2]:
+            splitter = Splitter(input_yaml, "", workers=workers, prune=True)
+            splitter.split()
+            self.assertEqual(sorted(splitter.pruned), [
+                "#/components/examples/Dead",
+                "#/components/requestBodies/Dead",
+                "#/components/responses/Alias",
+                "#/components/responses/Dead",
+                "#/components/schemas/Big",
+            ])
+            components = splitter.output_documents[-1].yaml["components"]
+            self.assertEqual(list(components), [
+                "responses", "requestBodies", "schemas"])
+            self.assertEqual(list(components["responses"]), ["A"])
+            self.assertEqual(list(components["requestBodies"]), ["A"])
+            self.assertEqual(list(components["schemas"]), ["A"])
+            self.assertEqual(input_yaml, expected)
+
+    def test_split_prune_discriminator_mapping(self):
+        input_yaml = {
+            "paths": {
+                "/animals": {"get": {"responses": {"200": {
+                    "description": "OK",
+                    "content": {"application/json": {"schema": {
+                        "$ref": "#/components/schemas/Animal"}}}}}}},
+            },
+            "components": {
+                "schemas": {
+                    "Animal": {
+                        "type": "object",
+                        "discriminator": {
+                            "propertyName": "kind",
+                            "mapping": {
+                                "dog": "#/components/schemas/Dog",
+                                "cat": "Cat",
+                            },
+                        },
+                    },
+                    "Dog": {"type": "object"},
+                    "Cat": {"type": "object"},
+                    "Unused": {"type": "object"},
+                },
+            },
+        }
+        expected = copy.deepcopy(input_yaml)
+
+        for workers in [1, 2]:
+            splitter = Splitter(input_yaml, "", workers=workers, prune=True)
+            splitter.split()
+            self.assertEqual(splitter.pruned,
+                             ["#/components/schemas/Unused"])
+            documents = {output_document.filename: output_document.yaml
+                         for output_document in splitter.output_documents}
+            self.assertEqual(
+                documents["components/schemas/Animal.yaml"]["discriminator"],
+                {"propertyName": "kind",
+                 "mapping": {"dog": "./Dog.yaml", "cat": "Cat"}})
+            self.assertIn("components/schemas/Dog.yaml", documents)
+            self.assertIn("components/schemas/Cat.yaml", documents)
+            self.assertTrue(
+                verify_output_documents(splitter.output_documents).ok)
+            self.assertEqual(input_yaml, expected)
+
+    def test_default_chunk_size(self):
+        yaml = {
+            "paths": {f"/p{i}": {} for i in range(100)},
+            "components": {"schemas": {f"S{i}": {} for i in range(20)}},
+        }
+        # 120 entries in about 4 tasks for each of the 4 workers.
+        chunk_size = default_chunk_size(yaml, 4)
+        self.assertEqual(chunk_size, 8)
+        _, partitions = partition_document(yaml, chunk_size)
+        self.assertEqual(len(partitions), 13 + 3)
+
+        self.assertEqual(default_chunk_size({}, 4), 1)
+        self.assertEqual(default_chunk_size(yaml, 1000), 1)
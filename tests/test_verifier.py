@@ -0,0 +1,158 @@
+import unittest
+import os
+import tempfile
+from openapi_splitter.splitter import OutputDocument, Splitter
+from openapi_splitter.verifier import NOT_FOUND, resolve_pointer, \
+    verify_output_documents, verify_output_dir
+from openapi_splitter.writer import STAGING_PREFIX, OutputWriter
+from openapi_splitter.io import read_yaml_from_file
+
+dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
+
+
+class TestVerifier(unittest.TestCase):
+    def test_verify_output_documents(self):
+        output_documents = [
+            OutputDocument("main.yaml", {
+                "paths": {"/a": {"$ref": "./paths/a/index.yaml"}},
+                "external": {"$ref": "https://example.com/a.yaml"},
+            }),
+            OutputDocument("paths/a/index.yaml", {"get": {"responses": {
+                "200": {"$ref": "../../components/schemas/A.yaml"},
+                "404": {"$ref": "#/components/responses/NotFound"},
+                "500": {"$ref": "../../components/schemas/B.yaml"},
+            }}}),
+            OutputDocument("components/schemas/A.yaml", {
+                "items": {"$ref": "./A.yaml#/properties/next"},
+                "properties": {"next": {"$ref": "./a.yaml"}},
+            }),
+            OutputDocument("components/schemas/a.yaml", {"allOf": [
+                {"$ref": "./A.yaml#/properties/missing"},
+                {"$ref": "./A.yaml"},
+            ]}),
+        ]
+
+        report = verify_output_documents(output_documents)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.documents, 4)
+        self.assertEqual(report.refs, 9)
+        self.assertEqual(sorted(report.dangling), [
+            ("components/schemas/a.yaml", "./A.yaml#/properties/missing"),
+            ("paths/a/index.yaml", "#/components/responses/NotFound"),
+            ("paths/a/index.yaml", "../../components/schemas/B.yaml"),
+        ])
+        self.assertEqual(report.duplicates, [])
+        self.assertEqual(report.case_collisions, [
+            ["components/schemas/A.yaml", "components/schemas/a.yaml"]])
+        self.assertEqual(report.cycles, [
+            ["components/schemas/A.yaml", "components/schemas/a.yaml"]])
+
+    def test_verify_output_dir(self):
+        file_path = dir_path + "../res/samples/petstore-expanded.yaml"
+        splitter = Splitter(read_yaml_from_file(file_path), "")
+        splitter.split()
+        self.assertTrue(
+            verify_output_documents(splitter.output_documents).ok)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            OutputWriter(temp_dir).write(splitter.output_documents)
+            report = verify_output_dir(temp_dir)
+            self.assertTrue(report.ok, str(report))
+            self.assertEqual(report.documents,
+                             len(splitter.output_documents))
+
+            os.remove(temp_dir + "/components/schemas/Pet.yaml")
+            report = verify_output_dir(temp_dir)
+            self.assertFalse(report.ok)
+            self.assertEqual(len(report.dangling), 4)
+            for _, ref in report.dangling:
+                self.assertTrue(ref.endswith("/Pet.yaml"))
+
+    def test_verify_output_dir_staging_and_invalid(self):
+        output_documents = [
+            OutputDocument("main.yaml", {
+                "paths": {"/a": {"$ref": "./paths/a/index.yaml"}}}),
+            OutputDocument("paths/a/index.yaml", {"get": {}}),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            OutputWriter(temp_dir).write(output_documents)
+            # A staging directory left by a killed write is not indexed.
+            staging_dir = temp_dir + "/" + STAGING_PREFIX + "stale"
+            os.makedirs(staging_dir + "/paths/a")
+            with open(staging_dir + "/main.yaml", 'w') as stream:
+                stream.write("a: {$ref: ./missing.yaml}\n")
+            with open(staging_dir + "/paths/a/index.yaml", 'w') as stream:
+                stream.write("get: {}\n")
+            report = verify_output_dir(temp_dir)
+            self.assertTrue(report.ok, str(report))
+            self.assertEqual(report.documents, 2)
+
+            with open(temp_dir + "/paths/a/index.yaml", 'w') as stream:
+                stream.write("get: [\n")
+            report = verify_output_dir(temp_dir)
+            self.assertFalse(report.ok)
+            self.assertEqual(report.documents, 2)
+            self.assertEqual(report.invalid, ["paths/a/index.yaml"])
+            self.assertEqual(report.dangling,
+                             [("main.yaml", "./paths/a/index.yaml")])
+
+    def test_resolve_pointer(self):
+        yaml = {"components": {"schemas": {"Pet": {"type": "object"}}},
+                "responses": {200: "ok", True: "yes", None: "none"}}
+        test_cases = [
+            ("/components/schemas/Pet", {"type": "object"}),
+            ("/components/schemas/pet", NOT_FOUND),
+            ("/components/schemas/PET", NOT_FOUND),
+            ("/responses/200", "ok"),
+            ("/responses/true", "yes"),
+            ("/responses/null", "none"),
+            ("/responses/True", NOT_FOUND),
+        ]
+        for pointer, expected in test_cases:
+            self.assertEqual(resolve_pointer(yaml, pointer), expected,
+                             pointer)
+
+        report = verify_output_documents([
+            OutputDocument("main.yaml", {
+                "a": {"$ref": "#/components/schemas/pet"},
+                "components": {"schemas": {"Pet": {}}}}),
+        ])
+        self.assertFalse(report.ok)
+        self.assertEqual(report.dangling,
+                         [("main.yaml", "#/components/schemas/pet")])
+
+    def test_verify_duplicates(self):
+        # Names that only differ in case are a warning.
+        output_documents = [
+            OutputDocument("main.yaml", {"a": [
+                {"$ref": "./components/schemas/Pet.yaml"},
+                {"$ref": "./components/schemas/pet.yaml"}]}),
+            OutputDocument("components/schemas/Pet.yaml", {}),
+            OutputDocument("components/schemas/pet.yaml", {}),
+        ]
+        report = verify_output_documents(output_documents)
+        self.assertTrue(report.ok, str(report))
+        self.assertEqual(report.duplicates, [])
+        self.assertEqual(len(report.case_collisions), 1)
+
+        # The same filename produced twice overwrites a document.
+        output_documents.append(
+            OutputDocument("./components/schemas/Pet.yaml", {"a": 1}))
+        report = verify_output_documents(output_documents)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.duplicates, ["components/schemas/Pet.yaml"])
+
+    def test_verify_discriminator_mapping(self):
+        output_documents = [
+            OutputDocument("main.yaml", {"a": {"$ref": "./Animal.yaml"}}),
+            OutputDocument("Animal.yaml", {"discriminator": {
+                "propertyName": "kind",
+                "mapping": {"dog": "./Dog.yaml", "cat": "Cat",
+                            "bird": "#/components/schemas/Bird"},
+            }}),
+            OutputDocument("Dog.yaml", {}),
+        ]
+        report = verify_output_documents(output_documents)
+        self.assertEqual(report.refs, 3)
+        self.assertEqual(report.dangling,
+                         [("Animal.yaml", "#/components/schemas/Bird")])
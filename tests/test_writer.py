@@ -0,0 +1,223 @@
+import unittest
+import unittest.mock
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+try:
+    import resource
+except ImportError:
+    resource = None
+from openapi_splitter.emitter import YamlEmitter
+from openapi_splitter.splitter import OutputDocument, Splitter
+from openapi_splitter.writer import OWNER_FILE, PUBLISH_FILE, \
+    STAGING_PREFIX, STALE_AGE, DurabilityPolicy, OutputWriter, \
+    collect_directories, count_makedirs_syscalls, remove_stale_staging_dirs
+from openapi_splitter.io import read_yaml_from_file
+
+dir_path = os.path.dirname(os.path.abspath(__file__)) + "/"
+
+
+class InterruptingEmitter(YamlEmitter):
+    """
+    Emitter that is interrupted after writing a number of documents.
+    """
+
+    def __init__(self, documents: int):
+        super().__init__()
+        self.documents = documents
+
+    def emit(self, data, stream) -> None:
+        if self.documents == 0:
+            raise KeyboardInterrupt()
+        self.documents -= 1
+        super().emit(data, stream)
+
+
+def split_sample() -> Splitter:
+    file_path = dir_path + "../res/samples/petstore-expanded.yaml"
+    splitter = Splitter(read_yaml_from_file(file_path), "")
+    splitter.split()
+    return splitter
+
+
+class TestWriter(unittest.TestCase):
+    def test_collect_directories(self):
+        output_documents = [
+            OutputDocument("main.yaml", {}),
+            OutputDocument("paths/a-b/index.yaml", {}),
+            OutputDocument("paths/a/b/index.yaml", {}),
+            OutputDocument("components/schemas/A.yaml", {}),
+            OutputDocument("components/schemas/B.yaml", {}),
+        ]
+        self.assertEqual(collect_directories(output_documents), [
+            "components",
+            "components/schemas",
+            "paths",
+            "paths/a",
+            "paths/a/b",
+            "paths/a-b",
+        ])
+
+    def test_count_makedirs_syscalls(self):
+        output_documents = [
+            OutputDocument("main.yaml", {}),
+            OutputDocument("paths/a/b/index.yaml", {}),
+            OutputDocument("paths/a/c/index.yaml", {}),
+            OutputDocument("paths/a/c/other.yaml", {}),
+        ]
+        # main.yaml: stat, mkdir, stat. paths/a/b: stat and mkdir for each
+        # of paths, paths/a and paths/a/b. paths/a/c: stat, mkdir. The
+        # second file in paths/a/c: stat, mkdir, stat.
+        self.assertEqual(count_makedirs_syscalls(output_documents),
+                         3 + 6 + 2 + 3)
+
+    def test_write(self):
+        splitter = split_sample()
+
+        for durability in DurabilityPolicy:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                writer = OutputWriter(temp_dir, durability=durability)
+                stats = writer.write(splitter.output_documents)
+                self.assertEqual(stats.documents,
+                                 len(splitter.output_documents))
+                self.assertEqual(stats.directories, 5)
+                self.assertEqual(stats.directory_syscalls, 2 + 3 * 5)
+                self.assertGreater(stats.syscalls_saved, 0)
+                # Every file, every directory, the staging directory, the
+                # list of published entries and the output directory.
+                syncs = len(splitter.output_documents) + 5 + 3
+                if durability == DurabilityPolicy.NONE:
+                    syncs = 0
+                self.assertEqual(stats.syncs, syncs)
+
+                self.assertEqual(sorted(os.listdir(temp_dir)),
+                                 ["components", "main.yaml", "paths"])
+                for output_document in splitter.output_documents:
+                    actual = read_yaml_from_file(
+                        temp_dir + "/" + output_document.filename)
+                    self.assertEqual(actual, output_document.yaml)
+
+    def test_durability_not_supported(self):
+        with unittest.mock.patch("openapi_splitter.writer.SUPPORTS_DIR_FD",
+                                 False):
+            OutputWriter("", durability=DurabilityPolicy.NONE)
+            for durability in [DurabilityPolicy.FILE,
+                               DurabilityPolicy.DIRECTORY]:
+                with self.assertRaises(ValueError):
+                    OutputWriter("", durability=durability)
+
+    @unittest.skipUnless(resource, "requires the resource module")
+    def test_write_many_directories(self):
+        # More directories than the process may have open files.
+        limit = 64
+        output_documents = [OutputDocument("main.yaml", {"a": 1})]
+        for i in range(limit * 2):
+            output_documents.append(OutputDocument(
+                f"paths/p{i}/__id__/index.yaml", {"i": i}))
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                for durability in DurabilityPolicy:
+                    output_dir = temp_dir + "/" + durability.value
+                    os.mkdir(output_dir)
+                    writer = OutputWriter(output_dir, durability=durability)
+                    stats = writer.write(output_documents)
+                    self.assertEqual(stats.directories, 1 + limit * 4)
+                    self.assertEqual(
+                        read_yaml_from_file(
+                            output_dir + "/paths/p99/__id__/index.yaml"),
+                        {"i": 99})
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    def test_write_interrupted(self):
+        splitter = split_sample()
+
+        for documents in [0, 3, len(splitter.output_documents) - 1]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                writer = OutputWriter(temp_dir, InterruptingEmitter(documents))
+                with self.assertRaises(KeyboardInterrupt):
+                    writer.write(splitter.output_documents)
+                self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_write_existing_output(self):
+        splitter = split_sample()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.mkdir(temp_dir + "/paths")
+            writer = OutputWriter(temp_dir)
+            with self.assertRaises(ValueError):
+                writer.write(splitter.output_documents)
+            # Entries published before the error are rolled back.
+            self.assertEqual(os.listdir(temp_dir), ["paths"])
+            self.assertEqual(os.listdir(temp_dir + "/paths"), [])
+
+    def test_write_removes_stale_staging(self):
+        splitter = split_sample()
+        dead_process = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead_process.wait()
+        host = socket.gethostname()
+
+        @dataclass
+        class TestCase:
+            name: str
+            owner: str
+            age: int
+            removed: bool
+
+        test_cases = [
+            TestCase("dead writer", f"{host} {dead_process.pid}", 0, True),
+            TestCase("running writer", f"{host} {os.getpid()}", 0, False),
+            TestCase("no owner", None, 0, False),
+            TestCase("old without owner", None, STALE_AGE + 60, True),
+            TestCase("other host", "other-host 1", 0, False),
+            TestCase("old on other host", "other-host 1", STALE_AGE + 60,
+                     True),
+        ]
+        for test_case in test_cases:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                staging_dir = temp_dir + "/" + STAGING_PREFIX + "staging"
+                os.mkdir(staging_dir)
+                with open(staging_dir + "/main.yaml", 'w') as stream:
+                    stream.write("openapi: 3.0.0\n")
+                if test_case.owner:
+                    with open(staging_dir + "/" + OWNER_FILE, 'w') as stream:
+                        stream.write(test_case.owner + "\n")
+                mtime = time.time() - test_case.age
+                os.utime(staging_dir, (mtime, mtime))
+
+                OutputWriter(temp_dir).write(splitter.output_documents)
+                expected = ["components", "main.yaml", "paths"]
+                if not test_case.removed:
+                    expected.insert(0, STAGING_PREFIX + "staging")
+                self.assertEqual(sorted(os.listdir(temp_dir)), expected,
+                                 "failed {}".format(test_case.name))
+
+    def test_write_after_killed_publish(self):
+        splitter = split_sample()
+        dead_process = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead_process.wait()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # A write killed after moving components, before paths and
+            # main.yaml.
+            OutputWriter(temp_dir).write(splitter.output_documents)
+            staging_dir = temp_dir + "/" + STAGING_PREFIX + "killed"
+            os.mkdir(staging_dir)
+            os.rename(temp_dir + "/paths", staging_dir + "/paths")
+            os.rename(temp_dir + "/main.yaml", staging_dir + "/main.yaml")
+            with open(staging_dir + "/" + OWNER_FILE, 'w') as stream:
+                stream.write(f"{socket.gethostname()} {dead_process.pid}\n")
+            with open(staging_dir + "/" + PUBLISH_FILE, 'w') as stream:
+                stream.write("components\npaths\nmain.yaml\n")
+            # An entry that was there before is not touched.
+            os.mkdir(temp_dir + "/paths")
+
+            remove_stale_staging_dirs(temp_dir)
+            self.assertEqual(os.listdir(temp_dir), ["paths"])